@@ -0,0 +1,15 @@
+// Generated by bootstrap_schema.py - do not edit by hand.
+// Creates vertex indexes on the keys the claim loaders look vertices up by.
+def globals = [:]
+
+globals << [claimsSchemaHook : [
+  onStartUp: { ctx ->
+    ctx.logger.info("Creating claim dataset vertex indexes: claim_id, claimant_name, agent_id, claimant_id, rollup_id, bucket_id")
+    graph.createIndex('claim_id', Vertex.class)
+    graph.createIndex('claimant_name', Vertex.class)
+    graph.createIndex('agent_id', Vertex.class)
+    graph.createIndex('claimant_id', Vertex.class)
+    graph.createIndex('rollup_id', Vertex.class)
+    graph.createIndex('bucket_id', Vertex.class)
+  }
+] as LifeCycleHook]
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+benchmark_reads.py
+
+Usage:
+    (venv) $ python benchmark_reads.py [--sizes 1000,10000,100000] [--concurrency 1,8]
+                                       [--iterations 200] [--output benchmark_results.json] [--clear]
+
+Read-workload benchmark for the local Gremlin Server. For each graph size it loads a
+synthetic claims graph (claims, claimants, agents, and the filed / assigned_to /
+closed_by edges), then runs a fixed set of claim traversals repeatedly at each client
+concurrency level:
+
+    flatten_claim            the four-branch projection from flatten_data_cosmos.py
+    claimant_claim_agents    claimant -> claims -> assigned and closing agents
+    top_agents               the ten agents with the most assigned claims
+    claims_filed_in_range    claims filed in a random 90 day window
+
+Latency percentiles (p50/p95/p99) and throughput per traversal, size and concurrency are
+written as JSON with stable keys, so runs of different versions can be diffed.
+
+Degree skew uses the same options as data/claim_data_generator.py: --agent-distribution
+zipf, --supernode-share (agent 1 takes that fraction of all claims) and
+--claimant-distribution / --claims-per-claimant / --claimant-zipf-exponent for claimants
+with several claims.
+
+Loading a size replaces the whole graph. The benchmark refuses to start on a non-empty
+graph unless --clear is given.
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from gremlin_python.__version__ import version as gremlinpython_version
+from gremlin_python.driver import client
+
+from bootstrap_schema import apply_indexes, indexed_keys
+from create_vertices_local import to_property_value
+from local_graph import GREMLIN_WS
+from data.distributions import AGENT_DISTRIBUTIONS, CLAIMANT_DISTRIBUTIONS, assign_agents, assign_claimants
+from flatten_data_cosmos import build_flatten_query
+
+# ---- Config ----
+SIZES = [1000, 10000, 100000]   # Number of claims per benchmarked graph
+CONCURRENCY = [1, 8]            # Client threads issuing requests at the same time
+ITERATIONS = 200                # Measured requests per traversal, size and concurrency
+WARMUP = 20                     # Unmeasured requests before each measurement
+AGENTS = 25
+LOAD_BATCH = 1000               # Records sent per bulk-load request
+OUTPUT = "benchmark_results.json"
+# ----------------
+
+ACCIDENT_TYPES = ["slip and fall", "repetitive strain injury", "overexertion"]
+DATE_WINDOW_DAYS = 90
+DATE_SPAN_DAYS = 5 * 365
+
+# Bulk loading runs as Groovy on the server so a batch of records costs one round trip.
+# Edge ids follow create_edges_local.edge_id().
+LOAD_VERTICES_SCRIPT = """
+rows.each { r ->
+  def v = graph.addVertex(T.label, vertex_label)
+  r.each { k, val -> v.property(k, val) }
+}
+rows.size()
+"""
+
+LOAD_EDGES_SCRIPT = """
+rows.each { r ->
+  def claim = g.V().has('claim', 'claim_id', r.claim_id).next()
+  g.V().has('claimant', 'claimant_id', r.claimant_id).next()
+    .addEdge('filed', claim, T.id, "filed:${r.claimant_id}:${r.claim_id}".toString())
+  claim.addEdge('assigned_to', g.V().has('agent', 'agent_id', r.assigned_agent_id).next(),
+    T.id, "assigned_to:${r.claim_id}:${r.assigned_agent_id}".toString())
+  claim.addEdge('closed_by', g.V().has('agent', 'agent_id', r.close_agent_id).next(),
+    T.id, "closed_by:${r.claim_id}:${r.close_agent_id}".toString())
+}
+rows.size()
+"""
+
+# Traversal templates; parameters are passed as bindings
+TRAVERSALS = {
+    "flatten_claim": build_flatten_query(),
+    "claimant_claim_agents": (
+        "g.V().has('claimant', 'claimant_id', claimant_id)"
+        ".out('filed').out('assigned_to', 'closed_by').dedup().values('agent_name')"
+    ),
+    "top_agents": (
+        "g.V().hasLabel('agent').project('agent_id', 'claims')"
+        ".by('agent_id').by(__.in('assigned_to').count())"
+        ".order().by(select('claims'), desc).limit(10)"
+    ),
+    "claims_filed_in_range": (
+        "g.V().hasLabel('claim').has('filed_on', between(start, end)).values('claim_id')"
+    ),
+}
+
+def generate_dataset(num_claims, num_agents=AGENTS, seed=0, agent_distribution="uniform", zipf_exponent=1.2,
+                     supernode_share=0.0, claimant_distribution="single", claims_per_claimant=1.0,
+                     claimant_zipf_exponent=1.2):
+    """
+    Build synthetic claim, claimant and agent records shaped like the generated data files.
+    Property values are converted the way create_vertices_local.py stores them.
+    """
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    today = date(2025, 1, 1)
+    agents = [
+        {"agent_id": agent_id, "agent_name": f"Agent {agent_id}", "currently_active": rng.random() < 0.5}
+        for agent_id in range(1, num_agents + 1)
+    ]
+    agent_options = dict(distribution=agent_distribution, zipf_exponent=zipf_exponent,
+                         supernode_agent_id=1 if supernode_share else None, supernode_share=supernode_share)
+    assigned_agent_ids = assign_agents(np_rng, num_claims, num_agents, **agent_options)
+    close_agent_ids = assign_agents(np_rng, num_claims, num_agents, **agent_options)
+    claimant_ids = assign_claimants(np_rng, num_claims, claimant_distribution, claims_per_claimant,
+                                    claimant_zipf_exponent)
+
+    claimants = [
+        {"claimant_id": i, "claimant_name": f"Claimant {i}"}
+        for i in range(1, int(claimant_ids.max()) + 1)
+    ]
+    claims = []
+    for i in range(1, num_claims + 1):
+        claims.append({
+            "claim_id": f"C{i:07d}",
+            "claim_amount": round(rng.uniform(1000, 50000), 2),
+            "accident_type": rng.choice(ACCIDENT_TYPES),
+            "approved": rng.randint(0, 1),
+            "claimant_id": int(claimant_ids[i - 1]),
+            "assigned_agent_id": int(assigned_agent_ids[i - 1]),
+            "close_agent_id": int(close_agent_ids[i - 1]),
+            "filed_on": (today - timedelta(days=rng.randrange(DATE_SPAN_DAYS))).isoformat(),
+        })
+
+    def convert(records):
+        return [{k: to_property_value(k, v) for k, v in record.items()} for record in records]
+
+    return {"claim": convert(claims), "claimant": convert(claimants), "agent": convert(agents)}
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def load_graph(gremlin_client, dataset):
+    """
+    Replace the graph with the dataset: drop everything, index, then bulk-load vertices and edges.
+    """
+    gremlin_client.submit("g.V().drop()").all().result()
+    apply_indexes(gremlin_client, indexed_keys())
+    for label in ("agent", "claimant", "claim"):
+        for batch in _batches(dataset[label], LOAD_BATCH):
+            gremlin_client.submit(LOAD_VERTICES_SCRIPT, {"rows": batch, "vertex_label": label}).all().result()
+    edge_rows = [
+        {k: claim[k] for k in ("claim_id", "claimant_id", "assigned_agent_id", "close_agent_id")}
+        for claim in dataset["claim"]
+    ]
+    for batch in _batches(edge_rows, LOAD_BATCH):
+        gremlin_client.submit(LOAD_EDGES_SCRIPT, {"rows": batch}).all().result()
+
+def traversal_params(name, dataset, rng):
+    """
+    Pick random bindings for one run of a traversal.
+    """
+    if name == "flatten_claim":
+        return {"claim_id": rng.choice(dataset["claim"])["claim_id"]}
+    if name == "claimant_claim_agents":
+        return {"claimant_id": rng.choice(dataset["claimant"])["claimant_id"]}
+    if name == "claims_filed_in_range":
+        start = date(2025, 1, 1) - timedelta(days=rng.randrange(DATE_SPAN_DAYS))
+        return {"start": start.isoformat(), "end": (start + timedelta(days=DATE_WINDOW_DAYS)).isoformat()}
+    return {}
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def run_traversal(gremlin_client, query, params_list, concurrency):
+    """
+    Run the query once per params entry on `concurrency` threads.
+    Returns (latencies in seconds, wall-clock seconds, error count).
+    """
+    def timed(params):
+        start = time.perf_counter()
+        try:
+            gremlin_client.submit(query, params).all().result()
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, e
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed, params_list))
+    wall = time.perf_counter() - started
+    latencies = [latency for latency, error in outcomes if error is None]
+    return latencies, wall, len(outcomes) - len(latencies)
+
+def benchmark_size(gremlin_client, dataset, concurrency_levels, iterations, warmup, seed):
+    """
+    Measure every traversal at every concurrency level against the loaded graph.
+    """
+    results = []
+    for name, query in TRAVERSALS.items():
+        for concurrency in concurrency_levels:
+            rng = random.Random(f"{seed}:{name}:{concurrency}")
+            run_traversal(gremlin_client, query, [traversal_params(name, dataset, rng) for _ in range(warmup)],
+                          concurrency)
+            params_list = [traversal_params(name, dataset, rng) for _ in range(iterations)]
+            latencies, wall, errors = run_traversal(gremlin_client, query, params_list, concurrency)
+            latencies.sort()
+            result = {
+                "size": len(dataset["claim"]),
+                "traversal": name,
+                "concurrency": concurrency,
+                "iterations": iterations,
+                "errors": errors,
+                "p50_ms": round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+                "p95_ms": round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+                "p99_ms": round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+                "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+            }
+            print(f"[OK] size={result['size']} {name} c={concurrency}: p50={result['p50_ms']}ms "
+                  f"p95={result['p95_ms']}ms p99={result['p99_ms']}ms {result['throughput_rps']} req/s")
+            results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark claim read traversals on the local Gremlin Server.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma-separated claim counts")
+    parser.add_argument("--concurrency", default=",".join(map(str, CONCURRENCY)),
+                        help="comma-separated client concurrency levels")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--warmup", type=int, default=WARMUP)
+    parser.add_argument("--agents", type=int, default=AGENTS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--agent-distribution", choices=AGENT_DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--zipf-exponent", type=float, default=1.2)
+    parser.add_argument("--supernode-share", type=float, default=0.0,
+                        help="fraction of all claims assigned to and closed by agent 1")
+    parser.add_argument("--claimant-distribution", choices=CLAIMANT_DISTRIBUTIONS, default="single")
+    parser.add_argument("--claims-per-claimant", type=float, default=1.0)
+    parser.add_argument("--claimant-zipf-exponent", type=float, default=1.2)
+    parser.add_argument("--output", default=OUTPUT)
+    parser.add_argument("--clear", action="store_true", help="allow replacing a non-empty graph")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    concurrency_levels = [int(c) for c in args.concurrency.split(",")]
+
+    gremlin_client = None
+    try:
+        gremlin_client = client.Client(GREMLIN_WS, "g", pool_size=max(concurrency_levels))
+        existing = gremlin_client.submit("g.V().limit(1).count()").all().result()[0]
+        if existing and not args.clear:
+            print("[FATAL] The graph is not empty; rerun with --clear to let the benchmark replace it")
+            return
+
+        results = []
+        for size in sizes:
+            dataset = generate_dataset(
+                size, num_agents=args.agents, seed=args.seed, agent_distribution=args.agent_distribution,
+                zipf_exponent=args.zipf_exponent, supernode_share=args.supernode_share,
+                claimant_distribution=args.claimant_distribution, claims_per_claimant=args.claims_per_claimant,
+                claimant_zipf_exponent=args.claimant_zipf_exponent)
+            print(f"[INFO] Loading graph with {size} claims...")
+            load_graph(gremlin_client, dataset)
+            results += benchmark_size(gremlin_client, dataset, concurrency_levels,
+                                      args.iterations, args.warmup, args.seed)
+
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "gremlinpython": gremlinpython_version,
+                "python": platform.python_version(),
+                "sizes": sizes,
+                "concurrency": concurrency_levels,
+                "iterations": args.iterations,
+                "warmup": args.warmup,
+                "agents": args.agents,
+                "seed": args.seed,
+                "agent_distribution": args.agent_distribution,
+                "zipf_exponent": args.zipf_exponent,
+                "supernode_share": args.supernode_share,
+                "claimant_distribution": args.claimant_distribution,
+                "claims_per_claimant": args.claims_per_claimant,
+                "claimant_zipf_exponent": args.claimant_zipf_exponent,
+            },
+            "traversals": TRAVERSALS,
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"[DONE] Wrote {len(results)} results to {args.output}")
+    finally:
+        if gremlin_client:
+            gremlin_client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+bootstrap_schema.py
+
+Usage:
+    (venv) $ python bootstrap_schema.py                      # index a running local server
+    (venv) $ python bootstrap_schema.py --write-init-script  # regenerate the server startup script
+
+Creates TinkerGraph vertex indexes on the keys the local scripts look vertices up by,
+so has(label, key, value) lookups are hash lookups instead of full vertex scans.
+
+The indexed keys are driven by the loaders: every unique_key in
+local_graph.VERTEX_SOURCES, plus the keys the edge scripts use to find
+the other end of an edge. The same list is written to
+apache-tinkerpop-gremlin-server-3.7.3/scripts/claims-schema.groovy, which
+conf/gremlin-server.yaml runs at startup so the indexes exist before any data is loaded.
+"""
+import argparse
+import os
+from gremlin_python.driver import client
+
+from local_graph import GREMLIN_WS, VERTEX_SOURCES
+
+# ---- Config ----
+# Keys looked up by the edge scripts (claimant_id), rollups.py (rollup_id) and
+# date_buckets.py (bucket_id) that are not a loader unique_key
+LOOKUP_KEYS = ["claimant_id", "rollup_id", "bucket_id"]
+INIT_SCRIPT = "apache-tinkerpop-gremlin-server-3.7.3/scripts/claims-schema.groovy"
+# ----------------
+
+def indexed_keys():
+    """
+    Return the vertex property keys to index, in a stable order without duplicates.
+    """
+    keys = [unique_key for _, _, unique_key in VERTEX_SOURCES] + LOOKUP_KEYS
+    return list(dict.fromkeys(keys))
+
+def create_index_script(keys):
+    """
+    Build a Groovy snippet creating a vertex index on each key.
+    TinkerGraph's createIndex() is a no-op for keys that are already indexed.
+    """
+    return "\n".join(f"graph.createIndex('{key}', Vertex.class)" for key in keys)
+
+def write_init_script(path, keys):
+    """
+    Write the Gremlin Server init script that creates the indexes at startup.
+    """
+    statements = "\n".join(f"    graph.createIndex('{key}', Vertex.class)" for key in keys)
+    content = (
+        "// Generated by bootstrap_schema.py - do not edit by hand.\n"
+        "// Creates vertex indexes on the keys the claim loaders look vertices up by.\n"
+        "def globals = [:]\n"
+        "\n"
+        "globals << [claimsSchemaHook : [\n"
+        "  onStartUp: { ctx ->\n"
+        f"    ctx.logger.info(\"Creating claim dataset vertex indexes: {', '.join(keys)}\")\n"
+        f"{statements}\n"
+        "  }\n"
+        "] as LifeCycleHook]\n"
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    print(f"[OK] Wrote init script {path}")
+
+def apply_indexes(gremlin_client, keys):
+    """
+    Create the indexes on the graph held by a running Gremlin Server.
+    """
+    gremlin_client.submit(create_index_script(keys)).all().result()
+    print(f"[OK] Indexed vertex keys: {', '.join(keys)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Create TinkerGraph indexes for the claim dataset lookup keys.")
+    parser.add_argument("--write-init-script", action="store_true",
+                        help=f"regenerate {INIT_SCRIPT} instead of indexing a running server")
+    args = parser.parse_args()
+
+    keys = indexed_keys()
+    if args.write_init_script:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        write_init_script(os.path.join(script_dir, INIT_SCRIPT), keys)
+        return
+
+    gremlin_client = None
+    try:
+        gremlin_client = client.Client(GREMLIN_WS, "g")
+        apply_indexes(gremlin_client, keys)
+    except Exception as e:
+        print(f"[FATAL] Exception during run: {e}")
+        raise
+    finally:
+        if gremlin_client:
+            gremlin_client.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 from gremlin_python.driver import client, serializer
+import argparse
 import os
+import zlib
+from multiprocessing import Pool
 from dotenv import load_dotenv
 import json
 
+from profiling import profile_query, should_profile
+from ru_pacing import RuPacer, submit_paced
+
 # Load environment
 load_dotenv()
 
@@ -21,24 +27,37 @@ def connect_to_cosmos():
         message_serializer=serializer.GraphSONSerializersV2d0()
     )
 
-def create_edge_if_missing(client, out_v_id, in_v_id, edge_label):
-    check_query = f"g.V('{out_v_id}').outE('{edge_label}').where(inV().hasId('{in_v_id}')).limit(1)"
+def edge_id(edge_label, out_key, in_key):
+    # Deterministic edge id from the label and the business keys of both ends,
+    # so a rerun finds the existing edge with a single g.E(id) lookup
+    return f"{edge_label}:{out_key}:{in_key}"
+
+# No RU budget here; submit_paced() is used for its retry of throttled (429) requests
+_UNPACED = RuPacer(0)
+
+def create_edge_if_missing(client, out_v_id, in_v_id, edge_label, e_id):
+    check_query = f"g.E('{e_id}').limit(1)"
+    if should_profile():
+        profile_query(client, check_query, name="edge_lookup", target="cosmos", template="g.E('$edge_id').limit(1)")
     try:
-        results = client.submit(check_query).all().result()
+        results, _ = submit_paced(client, check_query, None, _UNPACED)
         exists = len(results) > 0
     except Exception as e:
         print(f"[ERROR] Failed edge existence check: {e}")
-        return
+        return 'error'
 
     if not exists:
-        create_query = f"g.V('{out_v_id}').addE('{edge_label}').to(g.V('{in_v_id}'))"
+        create_query = f"g.V('{out_v_id}').addE('{edge_label}').to(g.V('{in_v_id}')).property('id', '{e_id}')"
         try:
-            client.submit(create_query).all().result()
+            submit_paced(client, create_query, None, _UNPACED)
             print(f"[OK] Created '{edge_label}' edge from {out_v_id} to {in_v_id}")
+            return 'created'
         except Exception as e:
             print(f"[ERROR] Failed to create edge '{edge_label}' from {out_v_id} to {in_v_id}: {e}")
+            return 'error'
     else:
         print(f"[SKIP] '{edge_label}' edge already exists from {out_v_id} to {in_v_id}")
+        return 'skipped'
 
 def connect_claimants_to_claims(client):
     query = (
@@ -67,7 +86,7 @@ def connect_claimants_to_claims(client):
             print(f"[WARN] No claimant found with claimant_id {claimant_id} for claim {claim_id}")
             continue
 
-        create_edge_if_missing(client, claimant_vid[0], claim_vid, 'filed')
+        create_edge_if_missing(client, claimant_vid[0], claim_vid, 'filed', edge_id('filed', claimant_id, claim_id))
 
 def connect_claims_to_assigned_agent(client):
     query = (
@@ -99,7 +118,7 @@ def connect_claims_to_assigned_agent(client):
             print(f"[WARN] No agent found with agent_id {agent_id} for claim {claim_id}")
             continue
 
-        create_edge_if_missing(client, claim_vid, agent_vid[0], 'assigned_to')
+        create_edge_if_missing(client, claim_vid, agent_vid[0], 'assigned_to', edge_id('assigned_to', claim_id, agent_id))
 
 def connect_claims_to_closing_agent(client):
     query = (
@@ -131,11 +150,106 @@ def connect_claims_to_closing_agent(client):
             print(f"[WARN] No agent found with agent_id {agent_id} for claim {claim_id}")
             continue
 
-        create_edge_if_missing(client, claim_vid, agent_vid[0], 'closed_by')
+        create_edge_if_missing(client, claim_vid, agent_vid[0], 'closed_by', edge_id('closed_by', claim_id, agent_id))
+
+def shard_of(claim_id, num_shards):
+    # Stable shard for a claim; unlike hash() on str, crc32 is the same in every process and run
+    return zlib.crc32(str(claim_id).encode('utf-8')) % num_shards
+
+def fetch_claim_keys(client):
+    # Business keys and vertex id of every claim in one query; missing values come back as ''
+    query = (
+        "g.V().hasLabel('claim')"
+        ".project('claim_id', 'claimant_id', 'assigned_agent_id', 'close_agent_id', 'claim_vid')"
+        ".by('claim_id')"
+        ".by(coalesce(values('claimant_id'), constant('')))"
+        ".by(coalesce(values('assigned_agent_id'), constant('')))"
+        ".by(coalesce(values('close_agent_id'), constant('')))"
+        ".by(id())"
+    )
+    return client.submit(query).all().result()
+
+def link_claim_edges(client, record, counts):
+    # Create the filed, assigned_to and closed_by edges of one claim
+    claim_id = record['claim_id']
+    claim_vid = record['claim_vid']
+    links = [
+        ('filed', 'claimant', 'claimant_id', str(record['claimant_id'])),
+        ('assigned_to', 'agent', 'agent_id', str(record['assigned_agent_id'])),
+        ('closed_by', 'agent', 'agent_id', str(record['close_agent_id'])),
+    ]
+    for edge_label, other_label, other_key, other_val in links:
+        if not other_val:
+            counts['missing'] += 1
+            continue
+        other_vid, _ = submit_paced(client, f"g.V().hasLabel('{other_label}').has('{other_key}', '{other_val}').id()",
+                                    None, _UNPACED)
+        if not other_vid:
+            print(f"[WARN] No {other_label} found with {other_key} {other_val} for claim {claim_id}")
+            counts['missing'] += 1
+            continue
+        if edge_label == 'filed':
+            status = create_edge_if_missing(client, other_vid[0], claim_vid, edge_label,
+                                            edge_id(edge_label, other_val, claim_id))
+        else:
+            status = create_edge_if_missing(client, claim_vid, other_vid[0], edge_label,
+                                            edge_id(edge_label, claim_id, other_val))
+        counts['errors' if status == 'error' else status] += 1
+
+def link_shard(shard, records):
+    # Worker process: link every claim of one shard over its own Cosmos connection
+    counts = {'created': 0, 'skipped': 0, 'missing': 0, 'errors': 0}
+    client_conn = connect_to_cosmos()
+    try:
+        for record in records:
+            try:
+                link_claim_edges(client_conn, record, counts)
+            except Exception as e:
+                counts['errors'] += 1
+                print(f"[ERROR] Shard {shard}: linking claim {record['claim_id']} failed: {e}")
+    finally:
+        client_conn.close()
+
+    print(f"[OK] Shard {shard}: {len(records)} claims, {counts}")
+    return counts
+
+def link_edges_sharded(workers):
+    # Split claims into disjoint shards by hash of claim_id and link each shard in its own process.
+    # Every claim, and so every edge, has exactly one owner, so workers never create duplicates.
+    # The claim keys are read over a connection closed before the workers fork, so no
+    # worker inherits its websocket or executor threads
+    client_conn = connect_to_cosmos()
+    try:
+        records = fetch_claim_keys(client_conn)
+    finally:
+        client_conn.close()
+    shards = [[] for _ in range(workers)]
+    for record in records:
+        shards[shard_of(record['claim_id'], workers)].append(record)
+
+    with Pool(processes=workers) as pool:
+        results = pool.starmap(link_shard, list(enumerate(shards)))
+
+    # Merge the per-shard counts into one summary
+    totals = {'created': 0, 'skipped': 0, 'missing': 0, 'errors': 0}
+    for counts in results:
+        for key, value in counts.items():
+            totals[key] += value
+    print(f"[SUMMARY] {len(records)} claims in {workers} shards: {totals['created']} edges created, "
+          f"{totals['skipped']} already existed, {totals['missing']} missing an end, {totals['errors']} errors")
+    return totals
 
 def main():
+    parser = argparse.ArgumentParser(description="Link claims to their claimant and agents in Cosmos DB.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="link claims in this many worker processes, each owning a shard of claims")
+    args = parser.parse_args()
+
     client_conn = None
     try:
+        if args.workers > 1:
+            link_edges_sharded(args.workers)
+            return
         client_conn = connect_to_cosmos()
         connect_claimants_to_claims(client_conn)
         connect_claims_to_assigned_agent(client_conn)
@@ -1,6 +1,45 @@
+import argparse
+import random
+import sys
+import time
+import zlib
+from multiprocessing import Pool
 from gremlin_python.structure.graph import Graph
 from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
 from gremlin_python.process.graph_traversal import __  # for anonymous traversals
+from gremlin_python.process.traversal import T
+from gremlin_python.driver.protocol import GremlinServerError
+
+from local_graph import supports_transactions
+from profiling import profile_traversal, should_profile
+
+GREMLIN_WS = 'ws://localhost:8182/gremlin'
+MAX_RETRIES = 8        # Attempts per edge when a concurrent transaction conflicts
+RETRY_BASE_DELAY = 0.05  # Seconds before the first retry; doubles on every attempt
+
+# Edges linked for each claim in sharded mode:
+# (edge label, (out label, out key, claim field), (in label, in key, claim field))
+CLAIM_EDGES = [
+    ('filed', ('claimant', 'claimant_id', 'claimant_id'), ('claim', 'claim_id', 'claim_id')),
+    ('assigned_to', ('claim', 'claim_id', 'claim_id'), ('agent', 'agent_id', 'assigned_agent_id')),
+    ('closed_by', ('claim', 'claim_id', 'claim_id'), ('agent', 'agent_id', 'close_agent_id')),
+]
+
+def edge_id(edge_label, out_key, in_key):
+    # Deterministic edge id from the label and the business keys of both ends,
+    # so a rerun finds the existing edge with a single g.E(id) lookup
+    return f"{edge_label}:{out_key}:{in_key}"
+
+def create_edge_if_missing(g, edge_label, out_v_id, in_v_id, e_id):
+    # Create the edge with id e_id unless it already exists, in one round trip.
+    # Returns True if the edge was created, False if it already existed.
+    if should_profile():
+        # Profile only the id lookup; a profiled create would add the edge before the real run
+        profile_traversal(g.E(e_id), "edge_lookup", template="g.E($edge_id)")
+    return g.E(e_id).fold().coalesce(
+        __.unfold().constant(False),
+        __.V(out_v_id).addE(edge_label).to(__.V(in_v_id)).property(T.id, e_id).constant(True)
+    ).next()
 
 def connect_claimants_to_claims():
     # Connect to Gremlin server and create traversal source
@@ -25,12 +64,11 @@ def connect_claimants_to_claims():
                 continue
             claimant_vertex = claimant_vertices[0]
 
-            # Check if 'filed' edge from claimant to claim already exists
-            edge_exists = g.V(claimant_vertex.id).outE('filed').where(__.inV().hasId(claim_vertex.id)).hasNext()
+            # Create the 'filed' edge linking claimant to claim unless it already exists
+            created = create_edge_if_missing(g, 'filed', claimant_vertex.id, claim_vertex.id,
+                                             edge_id('filed', claimant_id, claim_id))
 
-            if not edge_exists:
-                # Create the 'filed' edge linking claimant to claim
-                g.V(claimant_vertex.id).addE('filed').to(__.V(claim_vertex.id)).next()
+            if created:
                 print(f"Created 'filed' edge from claimant {claimant_id} to claim {claim_id}")
             else:
                 print(f"'filed' edge already exists from claimant {claimant_id} to claim {claim_id}")
@@ -69,12 +107,11 @@ def connect_claims_to_assigned_agent():
                 continue
             agent_vertex = agent_vertices[0]
 
-            # Check if 'assigned_to' edge from claim to agent exists
-            edge_exists = g.V(claim_vertex.id).outE('assigned_to').where(__.inV().hasId(agent_vertex.id)).hasNext()
+            # Create 'assigned_to' edge linking claim to agent unless it already exists
+            created = create_edge_if_missing(g, 'assigned_to', claim_vertex.id, agent_vertex.id,
+                                             edge_id('assigned_to', claim_id, assigned_agent_id))
 
-            if not edge_exists:
-                # Create 'assigned_to' edge linking claim to agent
-                g.V(claim_vertex.id).addE('assigned_to').to(__.V(agent_vertex.id)).next()
+            if created:
                 print(f"Created 'assigned_to' edge from claim {claim_id} to agent {assigned_agent_id}")
             else:
                 print(f"'assigned_to' edge already exists from claim {claim_id} to agent {assigned_agent_id}")
@@ -112,12 +149,11 @@ def connect_claims_to_closing_agent():
                 continue
             agent_vertex = agent_vertices[0]
 
-            # Check if 'closed_by' edge from claim to agent exists
-            edge_exists = g.V(claim_vertex.id).outE('closed_by').where(__.inV().hasId(agent_vertex.id)).hasNext()
+            # Create 'closed_by' edge linking claim to closing agent unless it already exists
+            created = create_edge_if_missing(g, 'closed_by', claim_vertex.id, agent_vertex.id,
+                                             edge_id('closed_by', claim_id, close_agent_id))
 
-            if not edge_exists:
-                # Create 'closed_by' edge linking claim to closing agent
-                g.V(claim_vertex.id).addE('closed_by').to(__.V(agent_vertex.id)).next()
+            if created:
                 print(f"Created 'closed_by' edge from claim {claim_id} to agent {close_agent_id}")
             else:
                 print(f"'closed_by' edge already exists from claim {claim_id} to agent {close_agent_id}")
@@ -125,9 +161,116 @@ def connect_claims_to_closing_agent():
     finally:
         connection.close()
 
+def shard_of(claim_id, num_shards):
+    # Stable shard for a claim; unlike hash() on str, crc32 is the same in every process and run
+    return zlib.crc32(str(claim_id).encode('utf-8')) % num_shards
+
+def fetch_claim_keys(g):
+    # Business keys of every claim in one pass; missing values come back as ''
+    return g.V().hasLabel('claim').project('claim_id', 'claimant_id', 'assigned_agent_id', 'close_agent_id') \
+            .by('claim_id') \
+            .by(__.coalesce(__.values('claimant_id'), __.constant(''))) \
+            .by(__.coalesce(__.values('assigned_agent_id'), __.constant(''))) \
+            .by(__.coalesce(__.values('close_agent_id'), __.constant(''))).toList()
+
+def _is_conflict(error):
+    # TinkerTransactionGraph rejects a commit touching an element another transaction changed
+    return isinstance(error, GremlinServerError) and 'conflict' in str(error).lower()
+
+def with_conflict_retry(run):
+    # Run a traversal, retrying transaction conflicts with jittered exponential backoff.
+    # Callers pass idempotent traversals (deterministic edge ids), so a retry never duplicates
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            return run()
+        except Exception as e:
+            if not _is_conflict(e) or attempt == MAX_RETRIES:
+                raise
+            time.sleep(RETRY_BASE_DELAY * 2 ** (attempt - 1) * (1 + random.random()))
+
+def link_claim_edges(g, claim, counts):
+    # Create the three edges of one claim. Each edge is a single traversal: an existing edge
+    # is found by its deterministic id, otherwise both ends are looked up by business key
+    for edge_label, (out_label, out_key, out_field), (in_label, in_key, in_field) in CLAIM_EDGES:
+        out_val = str(claim.get(out_field, ''))
+        in_val = str(claim.get(in_field, ''))
+        if not out_val or not in_val:
+            counts['missing'] += 1
+            continue
+        e_id = edge_id(edge_label, out_val, in_val)
+        status = with_conflict_retry(lambda: g.E(e_id).fold().coalesce(
+            __.unfold().constant('skipped'),
+            __.V().has(out_label, out_key, out_val).as_('out')
+              .V().has(in_label, in_key, in_val)
+              .addE(edge_label).from_('out').property(T.id, e_id).constant('created'),
+            __.constant('missing')
+        ).next())
+        counts[status] += 1
+
+def link_shard(shard, claims, ws_url=GREMLIN_WS):
+    # Worker process: link every claim of one shard over its own connection
+    graph = Graph()
+    connection = DriverRemoteConnection(ws_url, 'g')
+    g = graph.traversal().withRemote(connection)
+    counts = {'created': 0, 'skipped': 0, 'missing': 0, 'errors': 0}
+
+    try:
+        for claim in claims:
+            try:
+                link_claim_edges(g, claim, counts)
+            except Exception as e:
+                counts['errors'] += 1
+                print(f"[ERROR] Shard {shard}: linking claim {claim['claim_id']} failed: {e}")
+    finally:
+        connection.close()
+
+    print(f"[OK] Shard {shard}: {len(claims)} claims, {counts}")
+    return counts
+
+def link_edges_sharded(workers, ws_url=GREMLIN_WS):
+    # Split claims into disjoint shards by hash of claim_id and link each shard in its own process.
+    # Every claim, and so every edge, has exactly one owner, so workers never create duplicates.
+    graph = Graph()
+    connection = DriverRemoteConnection(ws_url, 'g')
+    g = graph.traversal().withRemote(connection)
+    try:
+        claims = fetch_claim_keys(g)
+    finally:
+        connection.close()
+
+    shards = [[] for _ in range(workers)]
+    for claim in claims:
+        shards[shard_of(claim['claim_id'], workers)].append(claim)
+
+    with Pool(processes=workers) as pool:
+        results = pool.starmap(link_shard, [(shard, shard_claims, ws_url) for shard, shard_claims in enumerate(shards)])
+
+    # Merge the per-shard counts into one summary
+    totals = {'created': 0, 'skipped': 0, 'missing': 0, 'errors': 0}
+    for counts in results:
+        for key, value in counts.items():
+            totals[key] += value
+    print(f"[SUMMARY] {len(claims)} claims in {workers} shards: {totals['created']} edges created, "
+          f"{totals['skipped']} already existed, {totals['missing']} missing an end, {totals['errors']} errors")
+    return totals
+
 
 if __name__ == '__main__':
-    # Run all three connection functions sequentially
-    connect_claimants_to_claims()
-    connect_claims_to_assigned_agent()
-    connect_claims_to_closing_agent()
+    parser = argparse.ArgumentParser(description="Link claims to their claimant and agents.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="link claims in this many worker processes, each owning a shard of claims")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # The default TinkerGraph corrupts a vertex's edges when workers add edges to it at the
+        # same time, and every shard links to the shared agents
+        if not supports_transactions(GREMLIN_WS):
+            print("[FATAL] --workers needs the transactional graph; start the server with "
+                  "conf/gremlin-server-transaction.yaml or run with --workers 1")
+            sys.exit(1)
+        link_edges_sharded(args.workers)
+    else:
+        # Run all three connection functions sequentially
+        connect_claimants_to_claims()
+        connect_claims_to_assigned_agent()
+        connect_claims_to_closing_agent()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import argparse
 import json
 import os
 import glob
@@ -11,6 +12,10 @@ from gremlin_python.driver import client, serializer
 # 
 from gremlin_python.process.traversal import Cardinality
 
+from data.dataset_io import iter_record_batches
+from date_buckets import link_claim_to_bucket_cosmos
+from rollups import apply_rollup_deltas_cosmos, merge_deltas, read_claim_state_cosmos, rollup_deltas
+
 # Load environment variables
 load_dotenv()
 
@@ -20,6 +25,7 @@ PORT = int(os.getenv("AZURE_COSMOS_PORT", 443))
 USERNAME = os.getenv("AZURE_COSMOS_USERNAME")
 PASSWORD = os.getenv("AZURE_COSMOS_PASSWORD")
 PARTITION_KEY = os.getenv("AZURE_COSMOS_PARTITION_KEY", "pk")  # default assumed
+ROLLUP_FLUSH_EVERY = 1000   # Claims between rollup flushes
 
 # Set up Cosmos DB Gremlin client
 def connect_to_cosmos():
@@ -74,8 +80,34 @@ def add_vertex(client, label="vertex", unique_key=None, **properties):
 
 
 
+# Function to upsert one record; claims also update the rollups and their month bucket
+def load_record(client, label, unique_key, record, rollups):
+    if PARTITION_KEY not in record:
+        record[PARTITION_KEY] = label  # Default partition value
+    if label != "claim":
+        add_vertex(client, label=label, unique_key=unique_key, **record)
+        return
+    # Read the stored claim first, so only the difference is added to the rollups
+    old_claim = read_claim_state_cosmos(client, record[unique_key], record[PARTITION_KEY], PARTITION_KEY)
+    if add_vertex(client, label=label, unique_key=unique_key, **record) is None:
+        return
+    merge_deltas(rollups, rollup_deltas(old_claim, record))
+    link_claim_to_bucket_cosmos(client, record, PARTITION_KEY)
+
+# Function to write the summed rollup changes; what fails to apply is kept for the next flush
+def flush_rollups(client, rollups):
+    if not rollups:
+        return
+    count = len(rollups)
+    try:
+        apply_rollup_deltas_cosmos(client, rollups, PARTITION_KEY)
+        print(f"[OK] Applied rollup changes to {count} rollups")
+    except Exception as e:
+        print(f"[WARN] Rollup flush failed, {len(rollups)} rollup changes are kept for the next flush: {e}")
+
 # Function to load vertices from a directory of local JSON files
-def load_vertices_from_dir(directory, client, label, unique_key, file_pattern="*.json"):
+def load_vertices_from_dir(directory, client, label, unique_key, file_pattern="*.json", rollups=None):
+    rollups = {} if rollups is None else rollups
     directory = os.path.abspath(directory)
     if not os.path.isdir(directory):
         print(f"[WARN] Directory not found, skipping: {directory}")
@@ -96,20 +128,16 @@ def load_vertices_from_dir(directory, client, label, unique_key, file_pattern="*
             with open(filepath, "r", encoding="utf-8") as f:
                 obj = json.load(f)
 
-            if isinstance(obj, list):
-                for item in obj:
-                    if PARTITION_KEY not in item:
-                        item[PARTITION_KEY] = label  # Default partition value
-                    add_vertex(client, label=label, unique_key=unique_key, **item)
-                    count += 1
-            elif isinstance(obj, dict):
-                if PARTITION_KEY not in obj:
-                    obj[PARTITION_KEY] = label
-                add_vertex(client, label=label, unique_key=unique_key, **obj)
-                count += 1
-            else:
+            if isinstance(obj, dict):
+                obj = [obj]
+            elif not isinstance(obj, list):
                 print(f"[SKIP] {fname}: JSON root is not object or list")
                 continue
+            for item in obj:
+                load_record(client, label, unique_key, item, rollups)
+                count += 1
+                if label == "claim" and count % ROLLUP_FLUSH_EVERY == 0:
+                    flush_rollups(client, rollups)
 
             print(f"[OK] Processed {fname}")
         except Exception as e:
@@ -118,25 +146,64 @@ def load_vertices_from_dir(directory, client, label, unique_key, file_pattern="*
     print(f"[DONE] Loaded {count} {label} vertices from {directory}")
     return count
 
+# Function to load vertices from a Parquet dataset, one column batch at a time
+def load_vertices_from_parquet(path, client, label, unique_key, batch_size=10000, rollups=None):
+    rollups = {} if rollups is None else rollups
+    path = os.path.abspath(path)
+    if not os.path.isfile(path):
+        print(f"[WARN] Parquet file not found, skipping: {path}")
+        return 0
+
+    count = 0
+    for batch in iter_record_batches(path, batch_size=batch_size):
+        for item in batch:
+            try:
+                load_record(client, label, unique_key, item, rollups)
+                count += 1
+            except Exception as e:
+                print(f"[ERROR] Processing {label} {item.get(unique_key)}: {e} — skipping")
+                continue
+            if label == "claim" and count % ROLLUP_FLUSH_EVERY == 0:
+                flush_rollups(client, rollups)
+        print(f"[OK] Processed batch of {len(batch)} {label} records")
+    print(f"[DONE] Loaded {count} {label} vertices from {path}")
+    return count
+
 def main():
+    parser = argparse.ArgumentParser(description="Load claim, claimant and agent vertices into Cosmos DB.")
+    parser.add_argument("--from-parquet", action="store_true",
+                        help="read the generated Parquet datasets instead of the per-record JSON directories")
+    args = parser.parse_args()
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    claims_dir = os.path.join(script_dir, "data/claim_data")
-    claimants_dir = os.path.join(script_dir, "data/claimant_data")
-    agents_dir = os.path.join(script_dir, "data/agent_data")
+    sources = [
+        ("data/claim_data", "claim", "claim_id"),
+        ("data/claimant_data", "claimant", "claimant_name"),
+        ("data/agent_data", "agent", "agent_id"),
+    ]
 
     gremlin_client = None
+    rollups = {}
     try:
         gremlin_client = connect_to_cosmos()
         total = 0
-        total += load_vertices_from_dir(claims_dir, gremlin_client, label="claim", unique_key="claim_id")
-        total += load_vertices_from_dir(claimants_dir, gremlin_client, label="claimant", unique_key="claimant_name")
-        total += load_vertices_from_dir(agents_dir, gremlin_client, label="agent", unique_key="agent_id")
+        # Load from the JSON directories, or with --from-parquet from the Parquet datasets next to them
+        for rel_dir, label, unique_key in sources:
+            directory = os.path.join(script_dir, rel_dir)
+            if args.from_parquet:
+                total += load_vertices_from_parquet(directory + ".parquet", gremlin_client, label=label,
+                                                    unique_key=unique_key, rollups=rollups)
+            else:
+                total += load_vertices_from_dir(directory, gremlin_client, label=label, unique_key=unique_key,
+                                                rollups=rollups)
         print(f"[SUMMARY] Total vertices processed: {total}")
     except Exception as e:
         print(f"[FATAL] Exception during run: {e}")
         raise
     finally:
         if gremlin_client:
+            # Stored claims must not lose their rollup changes, even when the load is interrupted
+            flush_rollups(gremlin_client, rollups)
             gremlin_client.close()
 
 if __name__ == "__main__":
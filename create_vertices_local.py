@@ -3,42 +3,52 @@
 create_vertices.py
 
 Usage:
-    (venv) $ python create_vertices.py
+    (venv) $ python create_vertices.py [--from-parquet]
 
 Expect directories next to this script:
     ./data/claim_data        <-- contains claim_<id>.json files (one JSON object per file)
     ./data/claimant_data     <-- contains claimant_<id>.json files
     ./data/agent_data        <-- contains agent_<id>.json files
+
+With --from-parquet, records are read in column batches from ./data/claim_data.parquet,
+./data/claimant_data.parquet and ./data/agent_data.parquet instead
+(written by the generators with DATASET_FORMATS=parquet).
 """
+import argparse
 import json
 import os
 import glob
 import sys
 from gremlin_python.structure.graph import Graph
-from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
 from gremlin_python.process.graph_traversal import __
 from gremlin_python.process.traversal import Cardinality
+from gremlin_python.process.translator import Translator
 
-# ---- Config ----
-GREMLIN_WS = "ws://localhost:8182/gremlin"   # Gremlin server websocket URL; change if server location differs
-# ----------------
+from data.dataset_io import iter_record_batches
+from date_buckets import link_claim_to_bucket
+from profiling import profile_traversal, should_profile
+from local_graph import VERTEX_SOURCES, connect_to_gremlin_server
+from rollups import read_claim_state, update_claim_rollups
 
-def connect_to_gremlin_server(ws_url=GREMLIN_WS):
+def to_property_value(key, val):
     """
-    Connect to Gremlin server and return traversal source and connection.
-    This sets up communication with the graph database.
+    Convert a raw JSON value into the value stored on the vertex.
+    Complex types become JSON strings and properties ending with '_id' become strings.
     """
-    graph = Graph()
-    connection = DriverRemoteConnection(ws_url, 'g')
-    g = graph.traversal().withRemote(connection)
-    return g, connection
-
-def add_vertex(g, label="vertex", unique_key=None, **properties):
+    if isinstance(val, (list, dict)):
+        try:
+            return json.dumps(val, ensure_ascii=False)
+        except Exception:
+            return str(val)
+    # Convert properties ending with '_id' to string for uniformity
+    if key.endswith('_id'):
+        return str(val)
+    return val
+
+def build_vertex_upsert(g, label="vertex", unique_key=None, **properties):
     """
-    Find existing or create new vertex identified by (label, unique_key).
-    Ensures unique vertices by this key, sets properties with single cardinality.
-    Converts IDs and unique_key values to strings for consistency.
-    Returns the vertex added or found.
+    Build (but do not run) the find-or-create traversal for a vertex identified by (label, unique_key).
+    Shared by add_vertex() and the async loader, which submits the traversal's bytecode itself.
     """
     if unique_key is None or unique_key not in properties:
         raise ValueError("You must provide unique_key and it must exist in properties")
@@ -60,21 +70,39 @@ def add_vertex(g, label="vertex", unique_key=None, **properties):
     for k, val in properties.items():
         if k == unique_key:
             continue
-        if isinstance(val, (list, dict)):
-            try:
-                prop_val = json.dumps(val, ensure_ascii=False)
-            except Exception:
-                prop_val = str(val)
-        else:
-            # Convert properties ending with '_id' to string for uniformity
-            if k.endswith('_id'):
-                prop_val = str(val)
-            else:
-                prop_val = val
-        v = v.property(Cardinality.single, k, prop_val)
+        v = v.property(Cardinality.single, k, to_property_value(k, val))
+    return v
+
+def add_vertex(g, label="vertex", unique_key=None, **properties):
+    """
+    Find existing or create new vertex identified by (label, unique_key).
+    Ensures unique vertices by this key, sets properties with single cardinality.
+    Converts IDs and unique_key values to strings for consistency.
+    Returns the vertex added or found.
+    """
+    traversal = build_vertex_upsert(g, label=label, unique_key=unique_key, **properties)
+    if should_profile():
+        # The template is the same upsert with each value replaced by $<property>
+        template = build_vertex_upsert(Graph().traversal(), label=label, unique_key=unique_key,
+                                       **{k: f"${k}" for k in properties})
+        profile_traversal(traversal, f"add_vertex_{label}", Translator("g").translate(template.bytecode))
 
     # Return the created or existing vertex
-    return v.next()
+    return traversal.next()
+
+def load_record(g, label, unique_key, record):
+    """
+    Upsert one record as a vertex. Claims also update the dashboard rollups,
+    from the difference between the stored claim and the new record, and are
+    linked to the month bucket of their filed_on date (see date_buckets.py).
+    """
+    if label != "claim":
+        return add_vertex(g, label=label, unique_key=unique_key, **record)
+    old_claim = read_claim_state(g, record[unique_key])
+    vertex = add_vertex(g, label=label, unique_key=unique_key, **record)
+    update_claim_rollups(g, old_claim, record)
+    link_claim_to_bucket(g, record)
+    return vertex
 
 def load_vertices_from_dir(directory, g, label, unique_key, file_pattern="*.json"):
     """
@@ -107,10 +135,10 @@ def load_vertices_from_dir(directory, g, label, unique_key, file_pattern="*.json
             # Support both list of objects or single object JSON files
             if isinstance(obj, list):
                 for item in obj:
-                    add_vertex(g, label=label, unique_key=unique_key, **item)
+                    load_record(g, label, unique_key, item)
                     count += 1
             elif isinstance(obj, dict):
-                add_vertex(g, label=label, unique_key=unique_key, **obj)
+                load_record(g, label, unique_key, obj)
                 count += 1
             else:
                 print(f"[SKIP] {fname}: JSON root is not object or list")
@@ -122,29 +150,51 @@ def load_vertices_from_dir(directory, g, label, unique_key, file_pattern="*.json
     print(f"[DONE] Loaded {count} {label} vertices from {directory}")
     return count
 
+def load_vertices_from_parquet(path, g, label, unique_key, batch_size=10000):
+    """
+    Load all records of a Parquet dataset, reading it one column batch at a time.
+    For each record, add a vertex with the given label and unique key.
+    Returns count of vertices processed.
+    """
+    path = os.path.abspath(path)
+    if not os.path.isfile(path):
+        print(f"[WARN] Parquet file not found, skipping: {path}")
+        return 0
+
+    count = 0
+    for batch in iter_record_batches(path, batch_size=batch_size):
+        for item in batch:
+            try:
+                load_record(g, label, unique_key, item)
+                count += 1
+            except Exception as e:
+                print(f"[ERROR] Processing {label} {item.get(unique_key)}: {e} — skipping")
+        print(f"[OK] Processed batch of {len(batch)} {label} records")
+    print(f"[DONE] Loaded {count} {label} vertices from {path}")
+    return count
+
 def main():
+    parser = argparse.ArgumentParser(description="Load claim, claimant and agent vertices into the local Gremlin Server.")
+    parser.add_argument("--from-parquet", action="store_true",
+                        help="read the generated Parquet datasets instead of the per-record JSON directories")
+    args = parser.parse_args()
+
     # Determine absolute path to directories relative to this script
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
-    # Define expected data directories
-    claims_dir = os.path.join(script_dir, "data/claim_data")
-    claimants_dir = os.path.join(script_dir, "data/claimant_data")
-    agents_dir = os.path.join(script_dir, "data/agent_data")
-
     g, connection = None, None
     try:
         # Connect to Gremlin server once
         g, connection = connect_to_gremlin_server()
 
-        # Load claim vertices from claim JSON files
+        # Load claim, claimant and agent vertices from their JSON directories or Parquet datasets
         total = 0
-        total += load_vertices_from_dir(claims_dir, g, label="claim", unique_key="claim_id")
-
-        # Load claimant vertices from claimant JSON files
-        total += load_vertices_from_dir(claimants_dir, g, label="claimant", unique_key="claimant_name")
-
-        # Load agent vertices from agent JSON files
-        total += load_vertices_from_dir(agents_dir, g, label="agent", unique_key="agent_id")
+        for rel_dir, label, unique_key in VERTEX_SOURCES:
+            directory = os.path.join(script_dir, rel_dir)
+            if args.from_parquet:
+                total += load_vertices_from_parquet(directory + ".parquet", g, label=label, unique_key=unique_key)
+            else:
+                total += load_vertices_from_dir(directory, g, label=label, unique_key=unique_key)
 
         print(f"[SUMMARY] Total vertices processed: {total}")
     except Exception as e:
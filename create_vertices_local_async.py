@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+create_vertices_local_async.py
+
+Usage:
+    (venv) $ python create_vertices_local_async.py [--concurrency 16] [--queue-size 256]
+                                                   [--rollup-flush-every 1000] [--from-parquet]
+
+Pipelined version of create_vertices_local.py. Loading runs as three asyncio stages
+connected by bounded queues, so file reads, property conversion and network round
+trips overlap instead of running one after another per record:
+
+    read (JSON files or Parquet batches) -> transform (build upsert bytecode) -> submit (Gremlin Server)
+
+The bounded queues apply backpressure: when the server falls behind, the reader
+blocks instead of buffering the whole dataset in memory. Submissions go through
+gremlin_python's aiohttp transport, with at most --concurrency requests in flight.
+
+Claim rollup changes (see rollups.py) are summed in memory while loading and applied
+every --rollup-flush-every claims and when the load ends or is interrupted. Flushes
+run one at a time, so concurrent submissions never race on the same rollup vertex.
+Each claim link to its month bucket (see date_buckets.py) creates the bucket vertex if
+it is missing. TinkerGraph is not safe for concurrent edge adds on one vertex, so claim
+links hold a lock per bucket (the new one and, when the claim moves month, the old
+one): links to different months run concurrently, links to the same month one at a
+time, and a bucket is never created twice.
+"""
+import argparse
+import asyncio
+import contextlib
+import glob
+import json
+import os
+from gremlin_python.driver import client
+from gremlin_python.driver.aiohttp.transport import AiohttpTransport
+from gremlin_python.structure.graph import Graph
+
+from create_vertices_local import build_vertex_upsert
+from local_graph import GREMLIN_WS, VERTEX_SOURCES
+from data.dataset_io import iter_record_batches
+from date_buckets import bucket_id_for, build_bucket_link
+from rollups import (CLAIM_FIELDS, build_claim_state_read, build_rollup_update, claim_state_from_rows, merge_deltas,
+                     rollup_deltas)
+
+# ---- Config ----
+CONCURRENCY = 16     # Maximum number of upsert requests in flight
+QUEUE_SIZE = 256     # Capacity of each queue between stages
+ROLLUP_FLUSH_EVERY = 1000   # Claims between rollup flushes
+# ----------------
+
+# Marks the end of a stage's output
+_DONE = object()
+
+def connect_async_client(ws_url=GREMLIN_WS, concurrency=CONCURRENCY):
+    """
+    Create a Gremlin client with one aiohttp websocket connection per concurrent request.
+    """
+    return client.Client(
+        ws_url,
+        "g",
+        pool_size=concurrency,
+        transport_factory=lambda: AiohttpTransport(),
+    )
+
+def iter_json_files(directory, file_pattern="*.json"):
+    """
+    Yield the JSON file paths in a directory, skipping hidden and non-JSON files.
+    """
+    directory = os.path.abspath(directory)
+    if not os.path.isdir(directory):
+        print(f"[WARN] Directory not found, skipping: {directory}")
+        return
+    for filepath in sorted(glob.glob(os.path.join(directory, file_pattern))):
+        fname = os.path.basename(filepath)
+        if fname.startswith(".") or not fname.lower().endswith(".json"):
+            continue
+        yield filepath
+
+def _read_json(filepath):
+    with open(filepath, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+async def _read_parquet(path, label, unique_key, out_queue):
+    if not os.path.isfile(path):
+        print(f"[WARN] Parquet file not found, skipping: {path}")
+        return
+    batches = iter_record_batches(path)
+    while True:
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            break
+        for item in batch:
+            await out_queue.put((label, unique_key, item))
+
+async def read_stage(sources, out_queue):
+    """
+    Read each JSON file (or Parquet batch, for sources ending in .parquet) off the event loop
+    and queue (label, unique_key, record) items.
+    """
+    for directory, label, unique_key in sources:
+        if directory.endswith(".parquet"):
+            await _read_parquet(directory, label, unique_key, out_queue)
+            continue
+        for filepath in iter_json_files(directory):
+            fname = os.path.basename(filepath)
+            try:
+                obj = await asyncio.to_thread(_read_json, filepath)
+            except Exception as e:
+                print(f"[ERROR] Reading {fname}: {e} — skipping")
+                continue
+
+            # Support both list of objects or single object JSON files
+            if isinstance(obj, dict):
+                obj = [obj]
+            elif not isinstance(obj, list):
+                print(f"[SKIP] {fname}: JSON root is not object or list")
+                continue
+            for item in obj:
+                await out_queue.put((label, unique_key, item))
+    await out_queue.put(_DONE)
+
+async def transform_stage(in_queue, out_queue):
+    """
+    Convert queued records into upsert traversal bytecode ready for submission.
+    """
+    g = Graph().traversal()
+    while True:
+        item = await in_queue.get()
+        if item is _DONE:
+            break
+        label, unique_key, record = item
+        try:
+            traversal = build_vertex_upsert(g, label=label, unique_key=unique_key, **record)
+            bucket_id = bucket_id_for(record.get("filed_on")) if label == "claim" else None
+        except Exception as e:
+            print(f"[ERROR] Converting {label} record {record.get(unique_key)}: {e} — skipping")
+            continue
+        # Claims also read their stored state first, for the rollup deltas and their previous month
+        state_read = None
+        if label == "claim":
+            state_read = build_claim_state_read(g, record[unique_key], CLAIM_FIELDS + ("filed_on",)).bytecode
+        bucket_link = None
+        if bucket_id is not None:
+            bucket_link = (bucket_id, build_bucket_link(g, record[unique_key], bucket_id).bytecode)
+        await out_queue.put((label, str(record[unique_key]), traversal.bytecode, state_read, bucket_link, record))
+    await out_queue.put(_DONE)
+
+async def _submit_bytecode(gremlin_client, bytecode):
+    # submit_async() can block waiting for a pooled connection, so call it off the loop
+    future = await asyncio.to_thread(gremlin_client.submit_async, bytecode)
+    result_set = await asyncio.wrap_future(future)
+    return await asyncio.wrap_future(result_set.all())
+
+class RollupBuffer:
+    """
+    Sums claim rollup deltas in memory and applies them in batches, one flush at a time.
+    Deltas a failed flush did not apply stay in the buffer for the next one.
+    """
+
+    def __init__(self, flush_every=ROLLUP_FLUSH_EVERY):
+        self.totals = {}
+        self.claims = 0
+        self.flush_every = flush_every
+        self.lock = asyncio.Lock()
+
+    def add(self, deltas):
+        merge_deltas(self.totals, deltas)
+        self.claims += 1
+
+    def due(self):
+        return self.claims >= self.flush_every
+
+    async def flush(self, gremlin_client, force=True):
+        async with self.lock:
+            # Another task may have flushed while this one waited for the lock
+            if not force and not self.due():
+                return
+            pending = list(self.totals.items())
+            self.totals, self.claims = {}, 0
+            g = Graph().traversal()
+            try:
+                while pending:
+                    rollup_id, delta = pending[0]
+                    if any(delta.values()):
+                        await _submit_bytecode(gremlin_client, build_rollup_update(g, rollup_id, delta).bytecode)
+                    pending.pop(0)
+            finally:
+                merge_deltas(self.totals, dict(pending))
+
+class BucketLocks:
+    """
+    One asyncio lock per month bucket, so edge adds on a bucket vertex run one at a time.
+    """
+
+    def __init__(self):
+        self.locks = {}
+
+    @contextlib.asynccontextmanager
+    async def hold(self, bucket_ids):
+        async with contextlib.AsyncExitStack() as stack:
+            # Sorted, so two links needing the same pair of buckets never deadlock
+            for bucket_id in sorted(bucket_ids):
+                await stack.enter_async_context(self.locks.setdefault(bucket_id, asyncio.Lock()))
+            yield
+
+async def _submit_one(gremlin_client, label, unique_val, bytecode, state_read, bucket_link, record, counts,
+                      rollups, bucket_locks):
+    try:
+        old_claim = None
+        if state_read is not None:
+            old_claim = claim_state_from_rows(await _submit_bytecode(gremlin_client, state_read))
+        await _submit_bytecode(gremlin_client, bytecode)
+        # The claim is stored: record its rollup change before anything else can fail
+        if state_read is not None:
+            rollups.add(rollup_deltas(old_claim, record))
+        counts[label] = counts.get(label, 0) + 1
+    except Exception as e:
+        print(f"[ERROR] Upserting {label} '{unique_val}': {e}")
+        counts["errors"] = counts.get("errors", 0) + 1
+        return
+
+    if bucket_link is not None:
+        bucket_id, link = bucket_link
+        # A claim moving month also drops its edge on the old bucket
+        old_bucket_id = bucket_id_for((old_claim or {}).get("filed_on"))
+        try:
+            async with bucket_locks.hold({bucket_id, old_bucket_id} - {None}):
+                await _submit_bytecode(gremlin_client, link)
+        except Exception as e:
+            print(f"[ERROR] Linking claim '{unique_val}' to month bucket {bucket_id}: {e}")
+            counts["errors"] = counts.get("errors", 0) + 1
+
+async def submit_stage(in_queue, gremlin_client, concurrency, counts, rollups):
+    """
+    Submit queued upserts, never holding more than `concurrency` requests in flight.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket_locks = BucketLocks()
+    pending = set()
+
+    async def run(item):
+        try:
+            await _submit_one(gremlin_client, *item, counts, rollups, bucket_locks)
+            if rollups.due():
+                try:
+                    await rollups.flush(gremlin_client, force=False)
+                except Exception as e:
+                    print(f"[WARN] Rollup flush failed, the changes are kept for the next flush: {e}")
+        finally:
+            semaphore.release()
+
+    while True:
+        # Take a slot before pulling work so the queue keeps pushing back on the producers
+        await semaphore.acquire()
+        item = await in_queue.get()
+        if item is _DONE:
+            semaphore.release()
+            break
+        task = asyncio.create_task(run(item))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+
+async def load_vertices_pipelined(gremlin_client, sources, concurrency=CONCURRENCY, queue_size=QUEUE_SIZE,
+                                  rollup_flush_every=ROLLUP_FLUSH_EVERY):
+    """
+    Run the read -> transform -> submit pipeline over all sources.
+    Returns a dict of vertices processed per label (plus 'errors' if any failed).
+    """
+    read_queue = asyncio.Queue(maxsize=queue_size)
+    submit_queue = asyncio.Queue(maxsize=queue_size)
+    counts = {}
+    rollups = RollupBuffer(rollup_flush_every)
+    try:
+        await asyncio.gather(
+            read_stage(sources, read_queue),
+            transform_stage(read_queue, submit_queue),
+            submit_stage(submit_queue, gremlin_client, concurrency, counts, rollups),
+        )
+    finally:
+        # Stored claims must not lose their rollup changes, even when the load is interrupted
+        await rollups.flush(gremlin_client)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Load claim, claimant and agent vertices with an asyncio pipeline.")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="maximum upsert requests in flight")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="capacity of each queue between stages")
+    parser.add_argument("--rollup-flush-every", type=int, default=ROLLUP_FLUSH_EVERY,
+                        help="apply the summed rollup changes after this many claims")
+    parser.add_argument("--from-parquet", action="store_true",
+                        help="read the generated Parquet datasets instead of the per-record JSON directories")
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    suffix = ".parquet" if args.from_parquet else ""
+    sources = [(os.path.join(script_dir, rel_dir) + suffix, label, unique_key)
+               for rel_dir, label, unique_key in VERTEX_SOURCES]
+
+    gremlin_client = None
+    try:
+        gremlin_client = connect_async_client(concurrency=args.concurrency)
+        counts = asyncio.run(load_vertices_pipelined(
+            gremlin_client, sources, concurrency=args.concurrency, queue_size=args.queue_size,
+            rollup_flush_every=args.rollup_flush_every))
+        for label, count in counts.items():
+            if label != "errors":
+                print(f"[DONE] Loaded {count} {label} vertices")
+        if counts.get("errors"):
+            print(f"[WARN] {counts['errors']} records failed to load")
+        print(f"[SUMMARY] Total vertices processed: {sum(v for k, v in counts.items() if k != 'errors')}")
+    except Exception as e:
+        print(f"[FATAL] Exception during run: {e}")
+        raise
+    finally:
+        # Always close connection on exit
+        if gremlin_client:
+            try:
+                gremlin_client.close()
+            except Exception:
+                pass
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,16 @@ import os
 from faker import Faker
 import random
 
+from dataset_io import read_dataset, write_dataset
+
 # Initialize Faker
 fake = Faker()
 
 # Get the directory of the current script
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
-# Path to the claim data JSON
-claim_data_path = os.path.join(script_dir, "claim_data.json")
-
-# Load the claims data
-df = pd.read_json(claim_data_path)
+# Load the agent columns of the claims data (claim_data.parquet or claim_data.json)
+df = read_dataset(script_dir, "claim_data", columns=["assigned_agent_id", "close_agent_id"])
 
 # Combine assigned_agent_id and close_agent_id to extract all unique agent IDs
 all_agent_ids = pd.unique(pd.concat([df["assigned_agent_id"], df["close_agent_id"]]))
@@ -45,8 +44,6 @@ for agent_id in all_agent_ids:
 # Convert to DataFrame
 agent_info_df = pd.DataFrame(agent_info)
 
-# Save to JSON
-agent_json_path = os.path.join(script_dir, "agent_data.json")
-agent_info_df.to_json(agent_json_path, orient="records", indent=2)
-
-print(f"Agent info saved to {agent_json_path}")
+# Save to JSON and/or Parquet, per DATASET_FORMATS
+for path in write_dataset(agent_info_df, script_dir, "agent_data"):
+    print(f"Agent info saved to {path}")
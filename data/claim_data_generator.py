@@ -1,10 +1,24 @@
 import pandas as pd
+import numpy as np
 import os
-from faker import Faker
-import random
 
-# Initialize Faker to generate fake dates
-fake = Faker()
+from dataset_io import write_dataset
+from distributions import assign_agents, assign_claimants
+
+# Generation settings, read from environment variables. The defaults reproduce the
+# original dataset shape: 100 claims, one claim per claimant, uniform agent load.
+NUM_CLAIMS = int(os.getenv("NUM_CLAIMS", 100))
+NUM_AGENTS = int(os.getenv("NUM_AGENTS", 25))
+AGENT_DISTRIBUTION = os.getenv("AGENT_DISTRIBUTION", "uniform")          # uniform | zipf
+AGENT_ZIPF_EXPONENT = float(os.getenv("AGENT_ZIPF_EXPONENT", 1.2))
+SUPERNODE_AGENT_ID = int(os.getenv("SUPERNODE_AGENT_ID")) if os.getenv("SUPERNODE_AGENT_ID") else None
+SUPERNODE_SHARE = float(os.getenv("SUPERNODE_SHARE", 0.0))               # fraction of claims for the supernode
+CLAIMANT_DISTRIBUTION = os.getenv("CLAIMANT_DISTRIBUTION", "single")     # single | geometric | zipf
+CLAIMS_PER_CLAIMANT = float(os.getenv("CLAIMS_PER_CLAIMANT", 1.0))       # mean claims per claimant
+CLAIMANT_ZIPF_EXPONENT = float(os.getenv("CLAIMANT_ZIPF_EXPONENT", 1.2))
+SEED = int(os.getenv("SEED")) if os.getenv("SEED") else None
+
+rng = np.random.default_rng(SEED)
 
 # Get the directory path where this script is located
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,23 +29,32 @@ csv_path = os.path.join(script_dir, "original_sample_data.csv")
 # Read the CSV data into a DataFrame
 df = pd.read_csv(csv_path)
 
-# Take the first 100 rows as a subset to work with
-df_subset = df.head(100).copy()
+# Take the first NUM_CLAIMS rows as a subset to work with. Larger datasets resample the
+# CSV rows with replacement and number the claims C0000001, C0000002, ...
+if NUM_CLAIMS <= len(df):
+    df_subset = df.head(NUM_CLAIMS).copy()
+else:
+    df_subset = df.iloc[rng.integers(0, len(df), size=NUM_CLAIMS)].reset_index(drop=True)
+    df_subset["claim_id"] = [f"C{i:07d}" for i in range(1, NUM_CLAIMS + 1)]
 
 # If the "age" column exists, drop it
 if "age" in df_subset.columns:
     df_subset.drop(columns=["age"], inplace=True)
 
-# Generate a unique numeric claimant ID for each row (1 to N)
-df_subset["claimant_id"] = range(1, len(df_subset) + 1)
+# Assign numeric claimant IDs (1 to N); claimants can file several claims
+df_subset["claimant_id"] = assign_claimants(rng, len(df_subset), CLAIMANT_DISTRIBUTION, CLAIMS_PER_CLAIMANT,
+                                              CLAIMANT_ZIPF_EXPONENT)
 
-# Assign numeric agent IDs directly (without names)
-total_agents = 25
-df_subset["assigned_agent_id"] = [random.randint(1, total_agents) for _ in range(len(df_subset))]
-df_subset["close_agent_id"] = [random.randint(1, total_agents) for _ in range(len(df_subset))]
+# Assign numeric agent IDs directly (without names), optionally skewed towards a few agents
+agent_options = dict(distribution=AGENT_DISTRIBUTION, zipf_exponent=AGENT_ZIPF_EXPONENT,
+                     supernode_agent_id=SUPERNODE_AGENT_ID, supernode_share=SUPERNODE_SHARE)
+df_subset["assigned_agent_id"] = assign_agents(rng, len(df_subset), NUM_AGENTS, **agent_options)
+df_subset["close_agent_id"] = assign_agents(rng, len(df_subset), NUM_AGENTS, **agent_options)
 
-# Add a filed_on column with fake dates within the last 5 years
-df_subset["filed_on"] = [fake.date_between(start_date="-5y", end_date="today").isoformat() for _ in range(len(df_subset))]
+# Add a filed_on column with random dates within the last 5 years
+today = pd.Timestamp.today().normalize()
+days_ago = rng.integers(0, 5 * 365 + 1, size=len(df_subset))
+df_subset["filed_on"] = (today - pd.to_timedelta(days_ago, unit="D")).strftime("%Y-%m-%d")
 
 # Rename accident types to more descriptive names (assumes column already exists)
 df_subset["accident_type"] = df_subset["accident_type"].replace({
@@ -45,10 +68,6 @@ for col in ["Claimant Name", "Claimant ID", "Assigned Agent", "Assigned Agent ID
     if col in df_subset.columns:
         df_subset.drop(columns=[col], inplace=True)
 
-# Build the JSON file path in the script directory
-json_path = os.path.join(script_dir, "claim_data.json")
-
-# Save the dataframe subset as a JSON file with pretty indentation
-df_subset.to_json(json_path, orient="records", indent=2)
-
-print(f"Claim data saved to {json_path}")
+# Save the dataframe subset as JSON (pretty indented) and/or Parquet, per DATASET_FORMATS
+for path in write_dataset(df_subset, script_dir, "claim_data"):
+    print(f"Claim data saved to {path}")
@@ -2,17 +2,16 @@ import pandas as pd
 import os
 from faker import Faker
 
+from dataset_io import read_dataset, write_dataset
+
 # Initialize Faker
 fake = Faker()
 
 # Get the current directory
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
-# Path to the existing JSON file with claims
-input_json_path = os.path.join(script_dir, "claim_data.json")
-
-# Load the claim data
-df_claims = pd.read_json(input_json_path)
+# Load the claimant column of the claim data (claim_data.parquet or claim_data.json)
+df_claims = read_dataset(script_dir, "claim_data", columns=["claimant_id"])
 
 # Get unique claimant IDs
 unique_claimant_ids = df_claims["claimant_id"].drop_duplicates().tolist()
@@ -32,8 +31,6 @@ for claimant_id in unique_claimant_ids:
 # Convert to DataFrame
 claimant_info_df = pd.DataFrame(claimant_info)
 
-# Save the claimant info to a new JSON file
-output_json_path = os.path.join(script_dir, "claimant_data.json")
-claimant_info_df.to_json(output_json_path, orient="records", indent=2)
-
-print(f"Claimant info saved to {output_json_path}")
+# Save the claimant info as JSON and/or Parquet, per DATASET_FORMATS
+for path in write_dataset(claimant_info_df, script_dir, "claimant_data"):
+    print(f"Claimant info saved to {path}")
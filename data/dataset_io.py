@@ -0,0 +1,152 @@
+import os
+
+import pandas as pd
+
+# Formats the generators write, e.g. DATASET_FORMATS=json,parquet
+# JSON stays the default so existing workflows are unchanged
+DEFAULT_FORMATS = "json"
+
+# Column types for the Parquet files. Columns not listed keep the type pandas infers.
+COLUMN_TYPES = {
+    "claim_data": {
+        "claim_id": "string",
+        "claim_amount": "float64",
+        "accident_type": "string",
+        "approved": "int8",
+        "claimant_id": "int64",
+        "assigned_agent_id": "int64",
+        "close_agent_id": "int64",
+        "filed_on": "date32",
+    },
+    "claimant_data": {
+        "claimant_id": "int64",
+        "claimant_name": "string",
+        "date_of_birth": "date32",
+        "address": "string",
+        "job_title": "string",
+    },
+    "agent_data": {
+        "agent_id": "int64",
+        "agent_name": "string",
+        "email": "string",
+        "phone_number": "string",
+        "currently_active": "bool",
+    },
+}
+
+
+def output_formats():
+    """
+    Returns the dataset formats to write, read from the DATASET_FORMATS environment variable.
+    """
+    formats = [f.strip().lower() for f in os.getenv("DATASET_FORMATS", DEFAULT_FORMATS).split(",") if f.strip()]
+    unknown = set(formats) - {"json", "parquet"}
+    if unknown:
+        raise ValueError(f"Unknown DATASET_FORMATS: {', '.join(sorted(unknown))}")
+    return formats
+
+
+def _arrow_schema(df, name):
+    import pyarrow as pa
+
+    types = {
+        "string": pa.string(),
+        "float64": pa.float64(),
+        "int8": pa.int8(),
+        "int64": pa.int64(),
+        "date32": pa.date32(),
+        "bool": pa.bool_(),
+    }
+    column_types = COLUMN_TYPES.get(name, {})
+    fields = []
+    for column in df.columns:
+        if column in column_types:
+            fields.append(pa.field(column, types[column_types[column]]))
+        else:
+            fields.append(pa.field(column, pa.Schema.from_pandas(df[[column]], preserve_index=False).field(column).type))
+    return pa.schema(fields)
+
+
+def write_parquet(df, path, name):
+    """
+    Writes a DataFrame to Parquet with the column types declared for the dataset.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = df.copy()
+    for column, column_type in COLUMN_TYPES.get(name, {}).items():
+        if column_type == "date32" and column in df.columns:
+            df[column] = pd.to_datetime(df[column]).dt.date
+    table = pa.Table.from_pandas(df, schema=_arrow_schema(df, name), preserve_index=False)
+    pq.write_table(table, path)
+
+
+def write_dataset(df, script_dir, name, formats=None):
+    """
+    Writes a generated dataset as <name>.json and/or <name>.parquet in script_dir.
+
+    Returns:
+        list[str]: Paths of the files written.
+    """
+    if formats is None:
+        formats = output_formats()
+    paths = []
+    if "json" in formats:
+        json_path = os.path.join(script_dir, f"{name}.json")
+        df.to_json(json_path, orient="records", indent=2)
+        paths.append(json_path)
+    if "parquet" in formats:
+        parquet_path = os.path.join(script_dir, f"{name}.parquet")
+        write_parquet(df, parquet_path, name)
+        paths.append(parquet_path)
+    return paths
+
+
+def dataset_path(script_dir, name):
+    """
+    Returns the path of the most recently written <name>.parquet or <name>.json.
+    """
+    candidates = [os.path.join(script_dir, f"{name}.{ext}") for ext in ("parquet", "json")]
+    existing = [path for path in candidates if os.path.exists(path)]
+    if not existing:
+        raise FileNotFoundError(f"No {name}.parquet or {name}.json in {script_dir}")
+    return max(existing, key=os.path.getmtime)
+
+
+def read_dataset(script_dir, name, columns=None):
+    """
+    Reads a generated dataset into a DataFrame, preferring whichever format was written last.
+    Parquet reads only the requested columns.
+    """
+    path = dataset_path(script_dir, name)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    df = pd.read_json(path)
+    return df[columns] if columns else df
+
+
+def _json_value(value):
+    # Dates go back to the ISO strings the JSON files hold; numpy scalars become Python values
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def iter_record_batches(path, batch_size=10000, columns=None):
+    """
+    Yields lists of records from a Parquet dataset, one column batch at a time.
+    Values match what the JSON files hold, so loaders store the same properties for either format.
+    """
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        data = batch.to_pydict()
+        names = list(data)
+        yield [
+            {name: _json_value(value) for name, value in zip(names, row) if value is not None}
+            for row in zip(*(data[name] for name in names))
+        ]
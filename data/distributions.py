@@ -0,0 +1,77 @@
+import numpy as np
+
+AGENT_DISTRIBUTIONS = ("uniform", "zipf")
+CLAIMANT_DISTRIBUTIONS = ("single", "geometric", "zipf")
+
+
+def agent_weights(num_agents, distribution="uniform", zipf_exponent=1.2):
+    """
+    Returns the probability of each agent (agent 1 first) receiving a claim.
+
+    Args:
+        num_agents (int): Number of agents.
+        distribution (str): 'uniform', or 'zipf' where agent k gets weight 1 / k**zipf_exponent.
+        zipf_exponent (float): Skew of the zipf distribution; larger means a few agents own more claims.
+    """
+    if distribution == "uniform":
+        weights = np.ones(num_agents)
+    elif distribution == "zipf":
+        weights = 1.0 / np.arange(1, num_agents + 1) ** zipf_exponent
+    else:
+        raise ValueError(f"Unknown agent distribution: {distribution}")
+    return weights / weights.sum()
+
+
+def assign_agents(rng, num_claims, num_agents, distribution="uniform", zipf_exponent=1.2,
+                  supernode_agent_id=None, supernode_share=0.0):
+    """
+    Returns an array of agent ids (1..num_agents), one per claim.
+
+    When supernode_agent_id is set, that agent takes supernode_share of all claims and the
+    rest are spread over the agents with the chosen distribution. A share of 0.3 over one
+    million claims gives the supernode 300,000 edges.
+    """
+    agent_ids = rng.choice(np.arange(1, num_agents + 1), size=num_claims,
+                           p=agent_weights(num_agents, distribution, zipf_exponent))
+    if supernode_agent_id is not None and supernode_share > 0:
+        if not 1 <= supernode_agent_id <= num_agents:
+            raise ValueError(f"Supernode agent {supernode_agent_id} is not between 1 and {num_agents}")
+        agent_ids[rng.random(num_claims) < supernode_share] = supernode_agent_id
+    return agent_ids
+
+
+def assign_claimants(rng, num_claims, distribution="single", mean_claims=1.0, zipf_exponent=1.2):
+    """
+    Returns an array of claimant ids, one per claim, numbered from 1 without gaps.
+
+    Args:
+        distribution (str): 'single' gives every claimant exactly one claim. 'geometric' gives
+            each claimant a geometric number of claims, at least one and averaging mean_claims.
+            'zipf' draws claims from num_claims / mean_claims claimants so a few claimants
+            file most of them.
+        mean_claims (float): Average number of claims per claimant.
+        zipf_exponent (float): Skew of the 'zipf' distribution; larger means fewer claimants file more claims.
+    """
+    if distribution == "single":
+        return np.arange(1, num_claims + 1)
+
+    if mean_claims < 1:
+        raise ValueError("mean_claims must be at least 1")
+
+    if distribution == "geometric":
+        # Draw enough claimants to cover every claim, then cut the last one short
+        counts = rng.geometric(1.0 / mean_claims, size=int(num_claims / mean_claims) + 1)
+        while counts.sum() < num_claims:
+            counts = np.concatenate([counts, rng.geometric(1.0 / mean_claims, size=len(counts) // 2 + 1)])
+        claimant_ids = np.repeat(np.arange(1, len(counts) + 1), counts)[:num_claims]
+        return rng.permutation(claimant_ids)
+
+    if distribution == "zipf":
+        num_claimants = max(1, int(round(num_claims / mean_claims)))
+        drawn = rng.choice(np.arange(num_claimants), size=num_claims,
+                           p=agent_weights(num_claimants, "zipf", zipf_exponent))
+        # Renumber so claimant ids have no gaps
+        _, claimant_ids = np.unique(drawn, return_inverse=True)
+        return claimant_ids + 1
+
+    raise ValueError(f"Unknown claimant distribution: {distribution}")
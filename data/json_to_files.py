@@ -1,20 +1,17 @@
 import json
 import os
 
-def split_json_by_field(input_file, output_dir, field_name, prefix=None):
-    """
-    Splits a JSON file of records into individual files named by a given field.
-
-    Args:
-        input_file (str): Path to the JSON file (array or newline-delimited JSON).
-        output_dir (str): Directory where split files will be saved.
-        field_name (str): The field whose value will be used in file names.
-        prefix (str, optional): Prefix for output file names (defaults to field_name).
+from dataset_io import dataset_path, iter_record_batches
 
-    Returns:
-        list[str]: List of full paths to files created.
+def _iter_records(input_file):
     """
-    os.makedirs(output_dir, exist_ok=True)
+    Yields the records of a JSON file (array or newline-delimited JSON) or a Parquet file.
+    Parquet files are read one column batch at a time instead of all at once.
+    """
+    if input_file.endswith(".parquet"):
+        for batch in iter_record_batches(input_file):
+            yield from batch
+        return
 
     # Read the JSON file
     with open(input_file, "r", encoding="utf-8") as f:
@@ -25,12 +22,28 @@ def split_json_by_field(input_file, output_dir, field_name, prefix=None):
         except json.JSONDecodeError:
             f.seek(0)
             data = [json.loads(line) for line in f if line.strip()]
+    yield from data
+
+def split_json_by_field(input_file, output_dir, field_name, prefix=None):
+    """
+    Splits a JSON or Parquet file of records into individual files named by a given field.
+
+    Args:
+        input_file (str): Path to the JSON file (array or newline-delimited JSON) or Parquet file.
+        output_dir (str): Directory where split files will be saved.
+        field_name (str): The field whose value will be used in file names.
+        prefix (str, optional): Prefix for output file names (defaults to field_name).
+
+    Returns:
+        list[str]: List of full paths to files created.
+    """
+    os.makedirs(output_dir, exist_ok=True)
 
     if prefix is None:
         prefix = field_name
 
     created_files = []
-    for record in data:
+    for record in _iter_records(input_file):
         field_value = record.get(field_name)
         if field_value is None:
             raise ValueError(f"Record missing '{field_name}': {record}")
@@ -42,7 +55,7 @@ def split_json_by_field(input_file, output_dir, field_name, prefix=None):
             json.dump(record, out_f, ensure_ascii=False, indent=2)
         created_files.append(os.path.abspath(output_path))
 
-    print(f"Split {len(data)} records into '{os.path.abspath(output_dir)}' using '{field_name}' in filenames.")
+    print(f"Split {len(created_files)} records into '{os.path.abspath(output_dir)}' using '{field_name}' in filenames.")
     return created_files
 
 
@@ -51,16 +64,16 @@ if __name__ == "__main__":
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
     # For agents
-    agent_input = os.path.join(script_dir, "agent_data.json")
+    agent_input = dataset_path(script_dir, "agent_data")
     agent_output = os.path.join(script_dir, "agent_data")
     split_json_by_field(agent_input, agent_output, "agent_id", prefix="agent")
 
     # For claims
-    claim_input = os.path.join(script_dir, "claim_data.json")
+    claim_input = dataset_path(script_dir, "claim_data")
     claim_output = os.path.join(script_dir, "claim_data")
     split_json_by_field(claim_input, claim_output, "claim_id", prefix="claim")
 
     # For claimants
-    claimant_input = os.path.join(script_dir, "claimant_data.json")
+    claimant_input = dataset_path(script_dir, "claimant_data")
     claimant_output = os.path.join(script_dir, "claimant_data")
     split_json_by_field(claimant_input, claimant_output, "claimant_id", prefix="claimant")
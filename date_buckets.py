@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+date_buckets.py
+
+Usage:
+    (venv) $ python date_buckets.py --start 2023-07-01 --end 2023-09-30   # claims filed in Q3 2023
+    (venv) $ python date_buckets.py --rebuild                            # link every stored claim
+
+Month bucket index for filed_on range queries. Each month that has claims gets a
+'month_bucket' vertex, and a 'contains' edge links it to every claim filed that month:
+
+    month_bucket (bucket_id '2023-07') -> contains -> claim
+
+The edge id is 'contains:<bucket_id>:<claim_id>', so relinking an unchanged claim is a
+single g.E(id) lookup. When a claim's filed_on moves to another month, its old link is
+dropped in the same traversal. The vertex loaders keep the links up to date.
+
+A range query starts from the buckets of the months it covers and only filters the
+claims of the first and last month by date, so it reads the claims it returns plus at
+most two partial months instead of comparing filed_on on every claim. The edges run
+from bucket to claim because Cosmos stores an edge with its source vertex, so the
+bucket's claims are read from the bucket's own partition. On Cosmos each bucket's
+partition key value is its bucket_id, so the claims' edges are spread over one logical
+partition per month instead of all landing in one.
+"""
+import argparse
+from datetime import date
+from gremlin_python.process.graph_traversal import __
+from gremlin_python.process.traversal import P, T
+
+from local_graph import connect_to_gremlin_server
+
+BUCKET_LABEL = "month_bucket"
+BUCKET_EDGE = "contains"
+
+def bucket_id_for(filed_on):
+    """
+    Return the 'YYYY-MM' bucket of an ISO filed_on date, or None if it has none.
+    """
+    if not filed_on:
+        return None
+    return date.fromisoformat(str(filed_on)[:10]).strftime("%Y-%m")
+
+def bucket_edge_id(bucket_id, claim_id):
+    return f"{BUCKET_EDGE}:{bucket_id}:{claim_id}"
+
+def months_between(start, end):
+    """
+    Return the bucket ids of every month from start to end (ISO dates), inclusive.
+    """
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    if first > last:
+        return []
+    months = []
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+def build_bucket_upsert(g, bucket_id):
+    """
+    Build the traversal that finds or creates the bucket vertex for a month.
+    Pass __ instead of g to use it inside another traversal.
+    """
+    return g.V().has(BUCKET_LABEL, "bucket_id", bucket_id).fold().coalesce(
+        __.unfold(),
+        __.addV(BUCKET_LABEL).property("bucket_id", bucket_id)
+    )
+
+def build_bucket_link(g, claim_id, bucket_id):
+    """
+    Build the traversal linking a claim to its month bucket, creating the bucket if needed
+    and dropping the claim's link to any other month. Does nothing if the link exists.
+    """
+    claim_id = str(claim_id)
+    e_id = bucket_edge_id(bucket_id, claim_id)
+    return g.E(e_id).fold().coalesce(
+        __.unfold(),
+        build_bucket_upsert(__, bucket_id).as_("bucket")
+        .V().has("claim", "claim_id", claim_id)
+        .sideEffect(__.inE(BUCKET_EDGE).drop())
+        .addE(BUCKET_EDGE).from_("bucket").property(T.id, e_id)
+    )
+
+def link_claim_to_bucket(g, claim):
+    """
+    Link a claim record to the bucket of its filed_on month. Claims without filed_on are skipped.
+    """
+    bucket_id = bucket_id_for(claim.get("filed_on"))
+    if bucket_id is None:
+        return None
+    build_bucket_link(g, claim["claim_id"], bucket_id).iterate()
+    return bucket_id
+
+def claims_filed_between(g, start, end):
+    """
+    Return the properties of every claim filed from start to end (ISO dates, inclusive),
+    visiting only the buckets of the months in the range.
+    """
+    buckets = months_between(start, end)
+    if not buckets:
+        return []
+    # One eq lookup per month: TinkerGraph serves eq from the bucket_id index but scans for within()
+    months = [__.V().has(BUCKET_LABEL, "bucket_id", bucket_id) for bucket_id in buckets]
+    # Only claims of the first and last month can fall outside the range
+    t = g.inject(1).union(*months).out(BUCKET_EDGE) \
+        .has("filed_on", P.gte(start)).has("filed_on", P.lte(end))
+    rows = [{key: values[0] for key, values in props.items()} for props in t.valueMap().toList()]
+    return sorted(rows, key=lambda r: (r.get("filed_on", ""), r.get("claim_id", "")))
+
+def claims_filed_between_query(start, end, partition_key="pk"):
+    """
+    Return the Gremlin string for claims_filed_between() on Cosmos. The buckets are read
+    by id from their own partitions (partition key value = bucket_id) instead of scanning
+    every claim partition.
+    """
+    buckets = months_between(start, end)
+    if not buckets:
+        raise ValueError(f"start {start} is after end {end}")
+    bucket_ids = ", ".join(f"'{bucket_id}'" for bucket_id in buckets)
+    return (
+        f"g.V({bucket_ids}).has('{partition_key}', within({bucket_ids})).out('{BUCKET_EDGE}')"
+        f".has('filed_on', gte('{date.fromisoformat(start)}')).has('filed_on', lte('{date.fromisoformat(end)}'))"
+        f".valueMap()"
+    )
+
+def link_claim_to_bucket_cosmos(client, claim, partition_key="pk"):
+    """
+    Cosmos version of link_claim_to_bucket() for the string-query loaders.
+    The bucket vertex id and its partition key value are both its bucket_id, one logical
+    partition per month.
+    """
+    bucket_id = bucket_id_for(claim.get("filed_on"))
+    if bucket_id is None:
+        return None
+    claim_id = str(claim["claim_id"])
+    claim_pk = claim.get(partition_key, "claim")
+    e_id = bucket_edge_id(bucket_id, claim_id)
+
+    if client.submit(f"g.E('{e_id}').limit(1)").all().result():
+        return bucket_id
+    client.submit(
+        f"g.V('{bucket_id}').has('{partition_key}', '{bucket_id}').fold().coalesce(unfold(), "
+        f"addV('{BUCKET_LABEL}').property('id', '{bucket_id}').property('bucket_id', '{bucket_id}')"
+        f".property('{partition_key}', '{bucket_id}'))"
+    ).all().result()
+    client.submit(f"g.V('{claim_id}').has('{partition_key}', '{claim_pk}').inE('{BUCKET_EDGE}').drop()").all().result()
+    client.submit(
+        f"g.V('{bucket_id}').has('{partition_key}', '{bucket_id}').addE('{BUCKET_EDGE}')"
+        f".to(g.V('{claim_id}').has('{partition_key}', '{claim_pk}')).property('id', '{e_id}')"
+    ).all().result()
+    return bucket_id
+
+def rebuild_buckets(g):
+    """
+    Link every stored claim to its month bucket. A full scan; use it to backfill a graph
+    loaded before buckets existed. Returns the number of claims linked.
+    """
+    linked = 0
+    for props in g.V().hasLabel("claim").valueMap("claim_id", "filed_on").toList():
+        claim = {key: values[0] for key, values in props.items() if values}
+        if link_claim_to_bucket(g, claim):
+            linked += 1
+    return linked
+
+def main():
+    parser = argparse.ArgumentParser(description="Query or rebuild the month bucket index of claims.")
+    parser.add_argument("--start", help="first filed_on date to return (YYYY-MM-DD)")
+    parser.add_argument("--end", help="last filed_on date to return (YYYY-MM-DD)")
+    parser.add_argument("--rebuild", action="store_true", help="link every stored claim to its month bucket")
+    args = parser.parse_args()
+    if bool(args.start) != bool(args.end):
+        parser.error("--start and --end must be given together")
+
+    g, connection = None, None
+    try:
+        g, connection = connect_to_gremlin_server()
+        if args.rebuild:
+            print(f"[DONE] Linked {rebuild_buckets(g)} claims to month buckets")
+        if args.start:
+            claims = claims_filed_between(g, args.start, args.end)
+            for claim in claims:
+                print(f"{claim.get('filed_on')}  {claim.get('claim_id'):<10} {claim.get('claim_amount')}")
+            print(f"[SUMMARY] {len(claims)} claims filed from {args.start} to {args.end}")
+    finally:
+        if connection:
+            connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+export_claims.py
+
+Usage:
+    (venv) $ python export_claims.py [--target local|cosmos] [--format ndjson|parquet]
+                                     [--output-dir exports/claims] [--page-size 1000] [--workers 4]
+                                     [--field claim=claim_id,claim_amount ...]
+
+Exports every claim in the flattened claim/claimant/assigned_agent/close_agent shape
+produced by flatten_data_cosmos.py, one row per claim. --field limits the export to
+the listed fields of each entity, which the server projects as scalars.
+
+The claim_id and vertex id of every claim are read in one pass, sorted by claim_id and
+split into pages of --page-size claims on the client. Only the ids are held for the
+whole graph; rows are bounded by the pages in flight. Each page is flattened by one
+of --workers threads with a single query that starts from g.V(ids), which both
+TinkerGraph and Cosmos serve by id, and written to its own part file
+(part-000000.ndjson, ...). Parquet parts all share one schema, so the directory reads
+as a single dataset.
+
+Part files are written atomically, and the claim_id range of every page is recorded
+in the state file before the page is exported. Re-running with the same output
+directory rewrites only the pages whose part is missing, from their recorded range,
+and then continues after the last recorded claim_id. Claims added or removed between
+runs therefore never shift the pages already written.
+"""
+import argparse
+import bisect
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from gremlin_python.driver import client
+
+from local_graph import GREMLIN_WS, server_ids
+from data.dataset_io import COLUMN_TYPES
+from flatten_data_cosmos import (HOSTNAME, USERNAME, PASSWORD, build_flatten_query, connect_to_gremlin,
+                                 replace_missing_fields)
+
+# ---- Config ----
+OUTPUT_DIR = "exports/claims"
+PAGE_SIZE = 1000
+WORKERS = 4
+# ----------------
+
+ENTITIES = ("claim", "claimant", "assigned_agent", "close_agent")
+STATE_FILE = "_export_state.json"
+
+# Generated dataset each entity's properties come from, for the Parquet schema
+ENTITY_DATASETS = {
+    "claim": "claim_data",
+    "claimant": "claimant_data",
+    "assigned_agent": "agent_data",
+    "close_agent": "agent_data",
+}
+
+def connect(target, workers):
+    """
+    Connect to the local Gremlin Server or Cosmos DB with one connection per worker,
+    plus one for the claim id read.
+    """
+    pool_size = workers + 1
+    if target == "cosmos":
+        if not all([HOSTNAME, USERNAME, PASSWORD]):
+            print("Error: Missing required environment variables (HOSTNAME, USERNAME, PASSWORD).", file=sys.stderr)
+            sys.exit(1)
+        return connect_to_gremlin(pool_size=pool_size)
+    return client.Client(GREMLIN_WS, "g", pool_size=pool_size)
+
+def fetch_claim_keys(gremlin_client):
+    """
+    Return (claim_ids, vertex_ids) of every claim, both in claim_id order.
+    One pass over the claims; sorting happens on the client, so the server never
+    filters or sorts per page.
+    """
+    query = "g.V().hasLabel('claim').project('claim_id', 'id').by(values('claim_id')).by(id())"
+    keys = sorted((row["claim_id"], row["id"]) for row in gremlin_client.submit(query).all().result())
+    return [claim_id for claim_id, _ in keys], [vertex_id for _, vertex_id in keys]
+
+def flatten_record(record):
+    """
+    Turn one flattened-claim query result into a single row.
+    Columns are named '<entity>.<property>'; entities that were not found are left empty.
+    Handles both the full valueMap() shape and the compact shape returned when fields are selected.
+    """
+    row = {}
+    for entity in ENTITIES:
+        if entity not in record:
+            continue
+        value = record[entity]
+        if not isinstance(value, dict):
+            row[f"{entity}.id"] = None
+            continue
+        if "properties" not in value:
+            for key, prop in value.items():
+                row[f"{entity}.{key}"] = prop
+            continue
+        row[f"{entity}.id"] = value.get("id")
+        for key, prop in value["properties"].items():
+            # valueMap() wraps every value in a list
+            row[f"{entity}.{key}"] = prop[0] if isinstance(prop, list) and len(prop) == 1 else prop
+    return row
+
+def parse_fields(specs):
+    """
+    Parse --field options of the form 'entity=field1,field2' into a fields dict
+    for build_flatten_query(). Returns None when no fields were given.
+    """
+    if not specs:
+        return None
+    fields = {}
+    for spec in specs:
+        entity, sep, names = spec.partition("=")
+        if not sep or not names:
+            raise ValueError(f"Invalid --field {spec!r}; expected entity=field1,field2")
+        fields.setdefault(entity, []).extend(name.strip() for name in names.split(",") if name.strip())
+    return fields
+
+def fetch_page_rows(gremlin_client, vertex_ids, fields=None):
+    """
+    Flatten all claims in one page with a single query, looking the claims up by vertex id.
+    The query text is the same for every page, so the server compiles it once.
+    """
+    query = build_flatten_query("g.V(ids)", fields=fields)
+    records = gremlin_client.submit(query, {"ids": server_ids(vertex_ids)}).all().result()
+    return [flatten_record(record) for record in replace_missing_fields(records)]
+
+def export_schema(fields=None):
+    """
+    Build the Arrow schema shared by every Parquet part. Columns follow the generated
+    datasets (or the selected fields), typed as the loaders store them: ids and dates
+    are strings, and vertex ids are exported as strings.
+    """
+    import pyarrow as pa
+
+    types = {"float64": pa.float64(), "int8": pa.int64(), "int64": pa.int64(), "bool": pa.bool_()}
+    columns = []
+    for entity in ENTITIES:
+        column_types = COLUMN_TYPES[ENTITY_DATASETS[entity]]
+        if fields is None:
+            names = ["id"] + list(column_types)
+        else:
+            names = fields.get(entity) or []
+        for name in names:
+            column_type = column_types.get(name, "string")
+            if name.endswith("_id") or name in ("id", "label"):
+                column_type = "string"
+            columns.append(pa.field(f"{entity}.{name}", types.get(column_type, pa.string())))
+    return pa.schema(columns)
+
+def _schema_value(value, arrow_type):
+    import pyarrow as pa
+
+    if value is None or not pa.types.is_string(arrow_type):
+        return value
+    return value if isinstance(value, str) else json.dumps(value) if isinstance(value, (list, dict)) else str(value)
+
+def write_part(rows, path, fmt, schema=None):
+    """
+    Write one page of rows, renaming into place only once the file is complete.
+    Parquet parts are written with `schema`, so every part has the same columns and types.
+    """
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        columns = {
+            field.name: [_schema_value(row.get(field.name), field.type) for row in rows]
+            for field in schema
+        }
+        pq.write_table(pa.Table.from_pydict(columns, schema=schema), tmp_path)
+    else:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False, default=str))
+                f.write("\n")
+    os.replace(tmp_path, path)
+
+def load_export_state(output_dir, page_size, fmt, fields=None):
+    """
+    Return the state of the export in output_dir, refusing to resume one written with a
+    different layout. state["pages"] lists the [after, last] claim_id range of every page.
+    """
+    state_path = os.path.join(output_dir, STATE_FILE)
+    layout = {"page_size": page_size, "format": fmt, "fields": fields}
+    if not os.path.exists(state_path):
+        return dict(layout, pages=[])
+    with open(state_path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    previous = {key: state.get(key) for key in layout}
+    if previous != layout:
+        raise ValueError(f"{output_dir} holds an export with {previous}; use a new output directory")
+    if "pages" not in state:
+        raise ValueError(f"{output_dir} holds an export without recorded page ranges; use a new output directory")
+    return state
+
+def save_export_state(output_dir, state):
+    state_path = os.path.join(output_dir, STATE_FILE)
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+def export_page(gremlin_client, page_number, vertex_ids, path, fmt, fields, schema):
+    rows = fetch_page_rows(gremlin_client, vertex_ids, fields)
+    write_part(rows, path, fmt, schema)
+    return page_number, len(rows)
+
+def iter_pages(claim_ids, vertex_ids, output_dir, state, page_size):
+    """
+    Yield (page_number, vertex_ids) for every page still to write, from the sorted claim ids:
+    first the recorded pages whose part file is missing, rebuilt from their claim_id range,
+    then new pages after the last recorded claim_id. New pages are recorded in the state
+    before they are yielded.
+    """
+    def position_after(claim_id):
+        return 0 if claim_id is None else bisect.bisect_right(claim_ids, claim_id)
+
+    for page_number, (after, last) in enumerate(state["pages"]):
+        if not os.path.exists(os.path.join(output_dir, f"part-{page_number:06d}.{state['format']}")):
+            yield page_number, vertex_ids[position_after(after):position_after(last)]
+
+    after = state["pages"][-1][1] if state["pages"] else None
+    for first in range(position_after(after), len(claim_ids), page_size):
+        end = min(first + page_size, len(claim_ids))
+        state["pages"].append([after, claim_ids[end - 1]])
+        save_export_state(output_dir, state)
+        yield len(state["pages"]) - 1, vertex_ids[first:end]
+        after = claim_ids[end - 1]
+
+def export_claims(gremlin_client, output_dir, fmt="ndjson", page_size=PAGE_SIZE, workers=WORKERS, fields=None):
+    """
+    Export all claims into part files under output_dir using a pool of worker threads.
+    `fields` limits the export to selected fields per entity; see build_flatten_query().
+    Returns (rows written, pages skipped because they already existed).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    state = load_export_state(output_dir, page_size, fmt, fields)
+    schema = export_schema(fields) if fmt == "parquet" else None
+    skipped = sum(
+        os.path.exists(os.path.join(output_dir, f"part-{page_number:06d}.{fmt}"))
+        for page_number in range(len(state["pages"]))
+    )
+
+    claim_ids, vertex_ids = fetch_claim_keys(gremlin_client)
+    print(f"[INFO] Read the ids of {len(claim_ids)} claims")
+
+    written = 0
+    pending = set()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for page_number, page_ids in iter_pages(claim_ids, vertex_ids, output_dir, state, page_size):
+            path = os.path.join(output_dir, f"part-{page_number:06d}.{fmt}")
+
+            # Keep at most two pages per worker in memory
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished_page, count = future.result()
+                    written += count
+                    print(f"[OK] Wrote page {finished_page} ({count} claims)")
+            pending.add(executor.submit(export_page, gremlin_client, page_number, page_ids, path, fmt, fields,
+                                        schema))
+
+        for future in pending:
+            finished_page, count = future.result()
+            written += count
+            print(f"[OK] Wrote page {finished_page} ({count} claims)")
+    return written, skipped
+
+def main():
+    parser = argparse.ArgumentParser(description="Export all claims as flattened rows to NDJSON or Parquet.")
+    parser.add_argument("--target", choices=["local", "cosmos"], default="local")
+    parser.add_argument("--format", choices=["ndjson", "parquet"], default="ndjson")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--field", action="append", metavar="ENTITY=FIELDS",
+                        help="export only these fields of an entity, e.g. claim=claim_id,claim_amount (repeatable)")
+    args = parser.parse_args()
+
+    gremlin_client = None
+    try:
+        fields = parse_fields(args.field)
+        gremlin_client = connect(args.target, args.workers)
+        written, skipped = export_claims(
+            gremlin_client, args.output_dir, fmt=args.format, page_size=args.page_size, workers=args.workers,
+            fields=fields)
+        if skipped:
+            print(f"[INFO] Skipped {skipped} pages already written")
+        print(f"[SUMMARY] Exported {written} claims to {os.path.abspath(args.output_dir)}")
+    except Exception as e:
+        print(f"[FATAL] Exception during export: {e}", file=sys.stderr)
+        raise
+    finally:
+        if gremlin_client:
+            gremlin_client.close()
+
+if __name__ == "__main__":
+    main()
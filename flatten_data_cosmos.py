@@ -2,6 +2,7 @@
 
 import json
 import os
+import re
 import sys
 from dotenv import load_dotenv
 from gremlin_python.driver import client, serializer
@@ -9,6 +10,8 @@ from gremlin_python.process.graph_traversal import __
 from gremlin_python.process.strategies import PartitionStrategy
 from gremlin_python.process.anonymous_traversal import traversal
 
+from profiling import profile_query, should_profile
+
 # Load environment variables
 load_dotenv()
 
@@ -19,22 +22,110 @@ USERNAME = os.getenv("AZURE_COSMOS_USERNAME")
 PASSWORD = os.getenv("AZURE_COSMOS_PASSWORD")
 PARTITION_KEY = os.getenv("AZURE_COSMOS_PARTITION_KEY", "pk")
 
-def connect_to_gremlin():
+def connect_to_gremlin(pool_size=None):
     """
     Establishes a connection to the Gremlin server and returns the client.
+    pool_size sets the number of connections, for callers that submit queries concurrently.
     """
     gremlin_client = client.Client(
         f"wss://{HOSTNAME}:{PORT}/",
         "g",
         username=USERNAME,
         password=PASSWORD,
-        message_serializer=serializer.GraphSONSerializersV2d0()
+        message_serializer=serializer.GraphSONSerializersV2d0(),
+        pool_size=pool_size
     )
     
     print("Connection to Cosmos DB successful.")
     return gremlin_client
 
-def get_flattened_claim_data(gremlin_client, claim_id):
+# Flattened claim/claimant/assigned_agent/close_agent projection, built by build_flatten_query().
+# This query is structured for maximum compatibility with Cosmos DB's Gremlin API.
+# It replaces elementMap() with a nested project() to explicitly fetch id, label, and properties.
+# It also uses coalesce() on all traversals to prevent errors if a related vertex is missing.
+# Each entry is (entity, traversal from the claim, placeholder when the vertex is missing).
+FLATTEN_ENTITIES = [
+    ("claim", "select('claim')", None),
+    ("claimant", "select('claim').in('filed')", "Not Found"),
+    ("assigned_agent", "select('claim').out('assigned_to')", "Not Found"),
+    ("close_agent", "select('claim').out('closed_by')", "Claim Not Closed"),
+]
+
+FULL_PROJECTION = "project('id', 'label', 'properties').by(id()).by(label()).by(valueMap())"
+
+FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Projected for a selected field the vertex does not have; replaced by None before results are returned
+MISSING_FIELD = "__missing__"
+
+def build_field_projection(field_names):
+    """
+    Returns a project() step yielding only the given fields as scalars.
+    'id' and 'label' select the vertex id and label; any other name selects that property.
+    A property missing on the vertex is projected as MISSING_FIELD, since a by() that yields
+    nothing is an error on Cosmos; replace_missing_fields() turns it into None.
+    """
+    by_steps = []
+    for name in field_names:
+        if not FIELD_NAME.match(name):
+            raise ValueError(f"Invalid field name: {name!r}")
+        if name == "id":
+            by_steps.append(".by(id())")
+        elif name == "label":
+            by_steps.append(".by(label())")
+        else:
+            by_steps.append(f".by(coalesce(values('{name}'), constant('{MISSING_FIELD}')))")
+    keys = ", ".join(f"'{name}'" for name in field_names)
+    return f"project({keys})" + "".join(by_steps)
+
+def build_flatten_query(claims="g.V().has('claim', 'claim_id', claim_id)", fields=None):
+    """
+    Returns the flattened claim query for the claims selected by the `claims` traversal.
+    The default selects a single claim through the `claim_id` binding.
+
+    By default each entity is returned as {id, label, properties: valueMap()}. Passing
+    `fields`, e.g. {"claim": ["claim_amount", "approved"], "assigned_agent": ["agent_name"]},
+    projects only those fields, unwrapped to scalars, and only for the listed entities.
+    """
+    if fields is not None:
+        unknown = set(fields) - {entity for entity, _, _ in FLATTEN_ENTITIES}
+        if unknown:
+            raise ValueError(f"Unknown entities in fields: {', '.join(sorted(unknown))}")
+
+    entities = []
+    by_steps = []
+    for entity, path, missing in FLATTEN_ENTITIES:
+        if fields is None:
+            projection = FULL_PROJECTION
+        elif fields.get(entity):
+            projection = build_field_projection(fields[entity])
+        else:
+            continue
+        entities.append(f"'{entity}'")
+        step = f"{path}.{projection}"
+        if missing is not None:
+            step = f"coalesce({step}, constant('{missing}'))"
+        by_steps.append(f".by({step})")
+
+    if not entities:
+        raise ValueError("fields must select at least one field")
+    return f"{claims}.as('claim').project({', '.join(entities)})" + "".join(by_steps)
+
+def replace_missing_fields(records):
+    """
+    Replace MISSING_FIELD in the selected-field results of build_flatten_query() with None,
+    in place. Returns the records.
+    """
+    for record in records:
+        for value in record.values():
+            # Only the compact shape (no 'properties' key) holds projected fields
+            if isinstance(value, dict) and "properties" not in value:
+                for key, prop in value.items():
+                    if prop == MISSING_FIELD:
+                        value[key] = None
+    return records
+
+def get_flattened_claim_data(gremlin_client, claim_id, fields=None, target="cosmos"):
     """
     Fetches a specific claim and its related claimant and agent data in a flattened structure
     by submitting a raw Gremlin query string.
@@ -42,6 +133,9 @@ def get_flattened_claim_data(gremlin_client, claim_id):
     Args:
         gremlin_client: The Gremlin client object.
         claim_id (str): The ID of the claim to query.
+        fields (dict, optional): Fields to return per entity; see build_flatten_query().
+            A selected field the vertex does not have is returned as None.
+        target (str): 'cosmos' or 'local', the server the client is connected to; picks the profiling step.
 
     Returns:
         list: A list containing the projected claim data, or an empty list if not found.
@@ -49,52 +143,17 @@ def get_flattened_claim_data(gremlin_client, claim_id):
     print(f"\nQuerying for claim: {claim_id}...")
     
     try:
-        # This query is structured for maximum compatibility with Cosmos DB's Gremlin API.
-        # It replaces elementMap() with a nested project() to explicitly fetch id, label, and properties.
-        # It also uses coalesce() on all traversals to prevent errors if a related vertex is missing.
-        query_string = f"""
-        g.V().has('claim', 'claim_id', '{claim_id}').as('claim').
-          project('claim', 'claimant', 'assigned_agent', 'close_agent').
-            by(
-                select('claim').project('id', 'label', 'properties')
-                    .by(id())
-                    .by(label())
-                    .by(valueMap())
-            ).
-            by(
-                coalesce(
-                    select('claim').in('filed').project('id', 'label', 'properties')
-                        .by(id())
-                        .by(label())
-                        .by(valueMap()),
-                    constant('Not Found')
-                )
-            ).
-            by(
-                coalesce(
-                    select('claim').out('assigned_to').project('id', 'label', 'properties')
-                        .by(id())
-                        .by(label())
-                        .by(valueMap()),
-                    constant('Not Found')
-                )
-            ).
-            by(
-                coalesce(
-                    select('claim').out('closed_by').project('id', 'label', 'properties')
-                        .by(id())
-                        .by(label())
-                        .by(valueMap()),
-                    constant('Claim Not Closed')
-                )
-            )
-        """
+        query_string = build_flatten_query(fields=fields)
+
+        if should_profile():
+            profile_query(gremlin_client, query_string, {"claim_id": claim_id},
+                          name="flatten_claim", target=target)
         
         # Submit the query string to the server
-        result_set = gremlin_client.submit(query_string)
+        result_set = gremlin_client.submit(query_string, {"claim_id": claim_id})
         
         # Wait for all results to be returned and convert the result set to a list
-        claim_data = result_set.all().result()
+        claim_data = replace_missing_fields(result_set.all().result())
 
         if claim_data:
             print(f"Found data for claim {claim_id}.")
@@ -0,0 +1,51 @@
+"""
+local_graph.py
+
+Connection settings and vertex sources shared by the local Gremlin Server scripts.
+Kept apart from the loaders so helper modules the loaders import (rollups.py,
+date_buckets.py, profiling.py) can use them without importing the loaders back.
+"""
+from gremlin_python.driver import client
+from gremlin_python.statics import long
+from gremlin_python.structure.graph import Graph
+from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
+
+# ---- Config ----
+GREMLIN_WS = "ws://localhost:8182/gremlin"   # Gremlin server websocket URL; change if server location differs
+# ----------------
+
+# Vertex sources loaded by the loaders: (data directory, label, unique_key)
+VERTEX_SOURCES = [
+    ("data/claim_data", "claim", "claim_id"),
+    ("data/claimant_data", "claimant", "claimant_name"),
+    ("data/agent_data", "agent", "agent_id"),
+]
+
+def connect_to_gremlin_server(ws_url=GREMLIN_WS):
+    """
+    Connect to Gremlin server and return traversal source and connection.
+    This sets up communication with the graph database.
+    """
+    graph = Graph()
+    connection = DriverRemoteConnection(ws_url, 'g')
+    g = graph.traversal().withRemote(connection)
+    return g, connection
+
+def supports_transactions(ws_url=GREMLIN_WS):
+    """
+    Return True if the server's graph supports transactions, i.e. it was started with
+    the transactional TinkerGraph (conf/gremlin-server-transaction.yaml).
+    """
+    gremlin_client = client.Client(ws_url, 'g')
+    try:
+        return bool(gremlin_client.submit("g.getGraph().features().graph().supportsTransactions()").all().result()[0])
+    finally:
+        gremlin_client.close()
+
+def server_ids(ids):
+    """
+    Return element ids read from the local server ready to be sent back to it.
+    The server assigns Long ids, which gremlin_python reads as int and would send back
+    as Int32; the id managers do not match those against the stored Long ids.
+    """
+    return [long(i) if isinstance(i, int) and not isinstance(i, bool) else i for i in ids]
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+profiling.py
+
+Usage:
+    (venv) $ GREMLIN_PROFILE=1 GREMLIN_PROFILE_SAMPLE_RATE=0.01 python create_vertices_local.py
+    (venv) $ python profiling.py [--dir profiles]    # summarize the captured profiles
+
+Opt-in traversal profiling for the loaders and queries. It is off unless GREMLIN_PROFILE
+is set, and then profiles a GREMLIN_PROFILE_SAMPLE_RATE share of calls (default all):
+
+    GREMLIN_PROFILE              1/true/yes turns profiling on
+    GREMLIN_PROFILE_SAMPLE_RATE  share of calls to profile, between 0 and 1
+    GREMLIN_PROFILE_DIR          directory the profiles are written to (default profiles)
+
+A sampled call first runs a profiled copy of its traversal, with .profile() on the local
+Gremlin Server or .executionProfile() on Cosmos, and then runs the traversal as usual.
+The profiled copy really executes, so only reads and idempotent upserts are profiled.
+
+Each profile is written to its own JSON file holding the query template, the query as
+run, the total time and one entry per step with its duration, share of the total,
+traverser and element counts, plus index hints: for the local server, which keys a graph
+step looks up and which of them are served by an index (an eq lookup on a key
+bootstrap_schema.py indexes); for Cosmos, how many
+partitions each backend operation fanned out to.
+"""
+import argparse
+import glob
+import itertools
+import json
+import os
+import random
+import re
+from datetime import datetime, timezone
+from gremlin_python.process.translator import Translator
+
+from bootstrap_schema import indexed_keys
+
+# ---- Config ----
+DEFAULT_PROFILE_DIR = "profiles"
+# ----------------
+
+# Keys a graph step filters on and their predicate, e.g. ('claim_id', 'eq') in
+# TinkerGraphStep(vertex,[~label.eq(claim), claim_id.eq(C0001)])
+LOOKUP_KEY = re.compile(r"(~?[A-Za-z_][A-Za-z0-9_]*)\.([a-zA-Z]+)\(")
+
+_sequence = itertools.count()
+
+def profiling_enabled():
+    """
+    Returns True when GREMLIN_PROFILE turns profiling on.
+    """
+    return os.getenv("GREMLIN_PROFILE", "").strip().lower() in ("1", "true", "yes")
+
+def should_profile():
+    """
+    Returns True when profiling is on and this call falls in the sample.
+    """
+    if not profiling_enabled():
+        return False
+    return random.random() < float(os.getenv("GREMLIN_PROFILE_SAMPLE_RATE", "1.0"))
+
+def profile_dir():
+    return os.getenv("GREMLIN_PROFILE_DIR", DEFAULT_PROFILE_DIR)
+
+def steps_from_tinkerpop(metrics, depth=0):
+    """
+    Turn TinkerPop profile() metrics into step dicts, nested steps following their parent.
+    """
+    steps = []
+    indexed = None
+    for metric in metrics:
+        step = {
+            "name": metric["name"],
+            "depth": depth,
+            "dur_ms": metric["dur"] / 1e6,
+            "percent": metric["annotations"].get("percentDur"),
+            "traversers": metric["counts"].get("traverserCount"),
+            "elements": metric["counts"].get("elementCount"),
+        }
+        if "GraphStep" in metric["name"]:
+            indexed = set(indexed_keys()) if indexed is None else indexed
+            lookups = [(key, predicate) for key, predicate in LOOKUP_KEY.findall(metric["name"])
+                       if not key.startswith("~")]
+            # TinkerGraph only answers eq lookups from an index; within() and ranges scan every vertex
+            step["index"] = {
+                "keys": [key for key, _ in lookups],
+                "indexed": [key for key, predicate in lookups if predicate == "eq" and key in indexed],
+            }
+        steps.append(step)
+        steps.extend(steps_from_tinkerpop(metric.get("metrics") or [], depth + 1))
+    return steps
+
+def steps_from_cosmos(profile):
+    """
+    Turn a Cosmos executionProfile() result into step dicts.
+    """
+    steps = []
+    for metric in profile.get("metrics", []):
+        store_ops = metric.get("storeOps") or []
+        step = {
+            "name": metric["name"],
+            "depth": 0,
+            "dur_ms": metric.get("time"),
+            "percent": (metric.get("annotations") or {}).get("percentTime"),
+            "traversers": None,
+            "elements": (metric.get("counts") or {}).get("resultCount"),
+        }
+        if store_ops:
+            step["index"] = {"partitions": max(op.get("fanoutFactor", 0) for op in store_ops),
+                             "store_ops": store_ops}
+        steps.append(step)
+    return steps
+
+def write_profile(name, template, query, target, total_ms, steps, bindings=None):
+    """
+    Write one profile to <profile dir>/<name>-<timestamp>-<n>.json and return its path.
+    """
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(directory, f"{name}-{stamp}-{os.getpid()}-{next(_sequence)}.json")
+    profile = {
+        "name": name,
+        "target": target,
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+        "template": template,
+        "query": query,
+        "bindings": bindings or {},
+        "total_ms": total_ms,
+        "steps": steps,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2, default=str)
+    return path
+
+def profile_traversal(traversal, name, template=None):
+    """
+    Profile a copy of a remote traversal on the local Gremlin Server and write it to a file.
+    Failures are reported and swallowed so profiling never breaks a load.
+    """
+    try:
+        query = Translator("g").translate(traversal.bytecode)
+        metrics = traversal.clone().profile().next()
+        return write_profile(name, template or query, query, "local", metrics["dur"] / 1e6,
+                             steps_from_tinkerpop(metrics["metrics"]))
+    except Exception as e:
+        print(f"[WARN] Profiling {name} failed: {e}")
+        return None
+
+def profile_query(gremlin_client, query, bindings=None, name="query", target="local", template=None):
+    """
+    Profile a Gremlin query string, with .executionProfile() on Cosmos or .profile() locally,
+    and write it to a file. Failures are reported and swallowed.
+    """
+    try:
+        if target == "cosmos":
+            result = gremlin_client.submit(f"{query}.executionProfile()", bindings).all().result()
+            profile = result[0] if result else {}
+            total_ms = profile.get("totalTime")
+            steps = steps_from_cosmos(profile)
+        else:
+            metrics = gremlin_client.submit(f"{query}.profile()", bindings).all().result()[0]
+            total_ms = metrics["dur"] / 1e6
+            steps = steps_from_tinkerpop(metrics["metrics"])
+        return write_profile(name, template or query, query, target, total_ms, steps, bindings)
+    except Exception as e:
+        print(f"[WARN] Profiling {name} failed: {e}")
+        return None
+
+def load_profiles(directory):
+    profiles = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            profiles.append(json.load(f))
+    return profiles
+
+def summarize(profiles):
+    """
+    Return one summary per profiled query name: sample count, mean total time and
+    the steps with the highest mean duration.
+    """
+    by_name = {}
+    for profile in profiles:
+        by_name.setdefault(profile["name"], []).append(profile)
+
+    summaries = []
+    for name, group in sorted(by_name.items()):
+        # Step names embed the values looked up, so steps are matched by position instead
+        step_names = {}
+        step_times = {}
+        for profile in group:
+            top_steps = [step for step in profile["steps"] if step.get("depth", 0) == 0]
+            for position, step in enumerate(top_steps):
+                if step.get("dur_ms") is not None:
+                    step_names.setdefault(position, step["name"])
+                    step_times.setdefault(position, []).append(step["dur_ms"])
+        hot_steps = sorted(((sum(t) / len(t), step_names[position]) for position, t in step_times.items()),
+                           reverse=True)
+        totals = [p["total_ms"] for p in group if p.get("total_ms") is not None]
+        summaries.append({
+            "name": name,
+            "samples": len(group),
+            "mean_ms": sum(totals) / len(totals) if totals else None,
+            "hot_steps": hot_steps[:3],
+        })
+    return summaries
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize captured traversal profiles.")
+    parser.add_argument("--dir", default=profile_dir(), help="directory holding the profile files")
+    args = parser.parse_args()
+
+    profiles = load_profiles(args.dir)
+    if not profiles:
+        print(f"[INFO] No profiles found in {args.dir}")
+        return
+    for summary in summarize(profiles):
+        mean = "n/a" if summary["mean_ms"] is None else f"{summary['mean_ms']:.2f} ms"
+        print(f"{summary['name']:<24} samples={summary['samples']:<6} mean={mean}")
+        for dur_ms, step in summary["hot_steps"]:
+            print(f"    {dur_ms:>10.3f} ms  {step}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+reset_graph.py
+
+Usage:
+    (venv) $ python reset_graph.py [--target local|cosmos] [--label claim ...]
+                                   [--batch-size 500] [--ru-budget 400] [--no-count] [--yes]
+
+Clears the graph before a reload: edges first, then vertices, in pages of --batch-size
+elements. A single g.V().drop() over a large Cosmos graph times out or is throttled
+halfway; paging keeps every request small and lets the run be paced and resumed.
+Each page reads a page of ids and drops exactly those with g.E(ids) or g.V(ids).
+
+--label limits the reset to vertices with that label (repeatable) and the edges touching
+them. Vertices are taken a page at a time and their edges dropped before them. On Cosmos
+the loaders use the label as the partition key value, so vertex reads stay inside one
+partition; month buckets are keyed by their own bucket_id, so each bucket page reads
+only the partitions of its buckets. A whole-graph reset on Cosmos also goes label by label, then sweeps up any
+vertex stored under another partition key value.
+
+--ru-budget caps the request units spent per second on Cosmos. Each response reports
+its charge, and the next page waits until the spend is back under the budget. Throttled
+(429) requests are retried after the delay Cosmos asks for.
+
+The remaining edges and vertices are counted once, per label, before the first page;
+--no-count skips that. Progress and the totals are saved to .reset_state.json after
+every page, so an interrupted reset continues with the same totals, without counting
+again, when run again with the same target and labels.
+Without --yes the script only reports what it would drop.
+"""
+import argparse
+import json
+import os
+import sys
+from gremlin_python.driver import client
+
+from date_buckets import BUCKET_LABEL
+from local_graph import GREMLIN_WS, server_ids
+from ru_pacing import RuPacer, submit_paced
+from flatten_data_cosmos import HOSTNAME, USERNAME, PASSWORD, PARTITION_KEY, connect_to_gremlin
+
+# ---- Config ----
+BATCH_SIZE = 500      # Elements dropped per request
+RU_BUDGET = 400       # Request units per second to stay under on Cosmos (0 = unlimited)
+STATE_FILE = ".reset_state.json"
+# ----------------
+
+LABELS = ("claim", "claimant", "agent", "rollup", "month_bucket")
+PHASES = ("edges", "vertices")
+
+def connect(target):
+    """
+    Connect to the local Gremlin Server or Cosmos DB.
+    """
+    if target == "cosmos":
+        if not all([HOSTNAME, USERNAME, PASSWORD]):
+            print("Error: Missing required environment variables (HOSTNAME, USERNAME, PASSWORD).", file=sys.stderr)
+            sys.exit(1)
+        return connect_to_gremlin()
+    return client.Client(GREMLIN_WS, "g")
+
+def vertex_scopes(target, labels):
+    """
+    Return (vertex traversal, partition filter) for each label to drop, or None to page
+    through the whole graph. On Cosmos a whole-graph reset also goes label by label, so
+    every page stays in one partition; the partition filter follows every g.V(ids).
+    """
+    if not labels:
+        if target != "cosmos":
+            return None
+        labels = LABELS
+    scopes = []
+    for label in labels:
+        if target != "cosmos":
+            scopes.append((f"g.V().hasLabel('{label}')", ""))
+        elif label == BUCKET_LABEL:
+            # Each month bucket is its own partition, keyed by its id; listing them reads one vertex per month
+            scopes.append((f"g.V().hasLabel('{label}')", f".has('{PARTITION_KEY}', within(ids))"))
+        else:
+            pk_filter = f".has('{PARTITION_KEY}', '{label}')"
+            scopes.append((f"g.V().hasLabel('{label}'){pk_filter}", pk_filter))
+    return scopes
+
+def load_state(path, target, labels):
+    """
+    Return the saved progress for this target and labels, or a fresh state.
+    """
+    fresh = {"target": target, "labels": sorted(labels), "completed": [], "dropped": dict.fromkeys(PHASES, 0),
+             "totals": None}
+    if not os.path.exists(path):
+        return fresh
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("target") != target or state.get("labels") != sorted(labels):
+        print(f"[WARN] {path} is for a different reset ({state.get('target')}, labels {state.get('labels')}); starting over")
+        return fresh
+    print(f"[INFO] Resuming reset: {state['dropped']['edges']} edges and {state['dropped']['vertices']} vertices already dropped")
+    return state
+
+def save_state(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+def count_remaining(gremlin_client, scopes, pacer):
+    """
+    Return {phase: number of elements} still to drop.
+    Edges between two selected labels are counted once per label, so the edge count can overshoot.
+    """
+    if scopes is None:
+        queries = {"edges": ["g.E()"], "vertices": ["g.V()"]}
+    else:
+        queries = {"edges": [f"{vertices}.bothE()" for vertices, _ in scopes],
+                   "vertices": [vertices for vertices, _ in scopes]}
+    return {
+        phase: sum(submit_paced(gremlin_client, f"{q}.count()", {}, pacer)[0][0] for q in phase_queries)
+        for phase, phase_queries in queries.items()
+    }
+
+def _drop_page(gremlin_client, phase, query, ids, previous_ids, state, totals, pacer, state_path):
+    # A page read again after its drop means the drop matched none of its ids; stop rather than loop
+    if previous_ids & set(ids):
+        raise RuntimeError(f"Dropping a page of {phase} removed nothing (e.g. id {ids[0]!r}); stopping")
+    # Drop exactly the ids read for this page, so every page is counted. Local ids go back
+    # as Long, the type the server assigned them
+    submit_paced(gremlin_client, query, {"ids": server_ids(ids)}, pacer)
+    state["dropped"][phase] += len(ids)
+    save_state(state_path, state)
+    done = state["dropped"][phase]
+    if totals is None:
+        print(f"[OK] {phase}: {done} dropped, {pacer.rate():.1f} RU/s")
+    else:
+        print(f"[OK] {phase}: {done}/{totals[phase]} dropped ({done / max(totals[phase], 1):.1%}), "
+              f"{pacer.rate():.1f} RU/s")
+    return set(ids)
+
+def drop_all(gremlin_client, state, totals, pacer, batch_size, state_path):
+    """
+    Drop every edge, then every vertex, one page of ids at a time.
+    """
+    for phase, select, drop in (("edges", "g.E()", "g.E(ids).drop()"), ("vertices", "g.V()", "g.V(ids).drop()")):
+        if phase in state["completed"]:
+            print(f"[SKIP] {phase} already dropped")
+            continue
+        previous_ids = set()
+        while True:
+            ids, _ = submit_paced(gremlin_client, f"{select}.limit({int(batch_size)}).id()", {}, pacer)
+            if not ids:
+                break
+            previous_ids = _drop_page(gremlin_client, phase, drop, ids, previous_ids, state, totals, pacer,
+                                      state_path)
+        state["completed"].append(phase)
+        save_state(state_path, state)
+
+def drop_labels(gremlin_client, scopes, state, totals, pacer, batch_size, state_path):
+    """
+    Drop the vertices of each label a page at a time: first the page's edges, a page of
+    edge ids at a time, then the page's vertices. No request walks the edges of vertices
+    outside the current page.
+    """
+    for vertices, pk_filter in scopes:
+        previous_vertex_ids = set()
+        while True:
+            vertex_ids, _ = submit_paced(gremlin_client, f"{vertices}.limit({int(batch_size)}).id()", {}, pacer)
+            if not vertex_ids:
+                break
+            previous_edge_ids = set()
+            while True:
+                edge_ids, _ = submit_paced(
+                    gremlin_client, f"g.V(ids){pk_filter}.bothE().limit({int(batch_size)}).id()",
+                    {"ids": server_ids(vertex_ids)}, pacer)
+                if not edge_ids:
+                    break
+                previous_edge_ids = _drop_page(gremlin_client, "edges", "g.E(ids).drop()", edge_ids,
+                                               previous_edge_ids, state, totals, pacer, state_path)
+            previous_vertex_ids = _drop_page(gremlin_client, "vertices", f"g.V(ids){pk_filter}.drop()", vertex_ids,
+                                             previous_vertex_ids, state, totals, pacer, state_path)
+
+def reset_graph(gremlin_client, target, labels, batch_size=BATCH_SIZE, ru_budget=RU_BUDGET, state_path=STATE_FILE,
+                count=True):
+    """
+    Drop the selected edges and vertices, edges first. Returns the number dropped per phase.
+    The remaining elements are counted once per reset, for progress; count=False skips that.
+    """
+    scopes = vertex_scopes(target, labels)
+    state = load_state(state_path, target, labels)
+    pacer = RuPacer(ru_budget if target == "cosmos" else 0)
+    if count and state.get("totals") is None:
+        remaining = count_remaining(gremlin_client, scopes, pacer)
+        state["totals"] = {phase: state["dropped"][phase] + remaining[phase] for phase in PHASES}
+        save_state(state_path, state)
+        print(f"[INFO] Dropping {remaining['edges']} edges and {remaining['vertices']} vertices")
+    totals = state.get("totals")
+    if scopes is None:
+        drop_all(gremlin_client, state, totals, pacer, batch_size, state_path)
+    else:
+        drop_labels(gremlin_client, scopes, state, totals, pacer, batch_size, state_path)
+        if not labels:
+            # Whole-graph reset on Cosmos: sweep up anything outside the label partitions
+            drop_all(gremlin_client, state, totals, pacer, batch_size, state_path)
+    os.remove(state_path)
+    if pacer.total:
+        print(f"[INFO] Spent {pacer.total:,.0f} RU")
+    return state["dropped"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop the graph (or some labels of it) in paced, resumable batches.")
+    parser.add_argument("--target", choices=("local", "cosmos"), default="local", help="graph to reset")
+    parser.add_argument("--label", action="append", choices=LABELS, default=[],
+                        help="only drop vertices with this label and their edges (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="elements dropped per request")
+    parser.add_argument("--ru-budget", type=float, default=RU_BUDGET,
+                        help="request units per second to stay under on Cosmos, 0 for no limit")
+    parser.add_argument("--no-count", action="store_true",
+                        help="skip counting what is left before dropping; progress then shows no totals")
+    parser.add_argument("--yes", action="store_true", help="actually drop; without it only the counts are shown")
+    args = parser.parse_args()
+
+    gremlin_client = None
+    try:
+        gremlin_client = connect(args.target)
+        if not args.yes:
+            pacer = RuPacer(args.ru_budget if args.target == "cosmos" else 0)
+            remaining = count_remaining(gremlin_client, vertex_scopes(args.target, args.label), pacer)
+            for phase in PHASES:
+                print(f"[INFO] Would drop {remaining[phase]} {phase}")
+            print("[INFO] Re-run with --yes to drop them")
+            return
+        dropped = reset_graph(gremlin_client, args.target, args.label,
+                              batch_size=args.batch_size, ru_budget=args.ru_budget, count=not args.no_count)
+        print(f"[SUMMARY] Dropped {dropped['edges']} edges and {dropped['vertices']} vertices")
+    except Exception as e:
+        print(f"[FATAL] Exception during run: {e}")
+        raise
+    finally:
+        # Always close connection on exit
+        if gremlin_client:
+            try:
+                gremlin_client.close()
+            except Exception:
+                pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+rollups.py
+
+Usage:
+    (venv) $ python rollups.py [--type agent|accident_type|status]   # print the dashboard rollups
+    (venv) $ python rollups.py --rebuild                             # recompute them from every claim
+
+Materialized aggregate vertices for the dashboards, kept by the local and Cosmos vertex
+loaders (this script reads and rebuilds the local ones). Each 'rollup' vertex holds the running totals for one group of claims:
+
+    rollup_id            'agent:14', 'accident_type:slip and fall', 'status:open', ...
+    rollup_type          'agent', 'accident_type' or 'status'
+    rollup_key           the group value, e.g. '14'
+    claim_count          number of claims in the group
+    approved_count       number of those claims that were approved
+    claim_amount_total   sum of their claim_amount
+
+Claims are grouped by assigned agent, by accident type and by status (closed when the
+claim has a close_agent_id). The vertex loaders read a claim's previous values before
+upserting it and apply only the difference, so the rollups follow inserts and changes
+without rescanning the graph. A dashboard reads one vertex per group instead.
+
+Locally the difference is added on the server with sack arithmetic. Cosmos has no
+sack(), so the Cosmos loader reads the current totals, adds the difference on the
+client and writes the new totals back. That read and write are separate requests, so
+only one Cosmos loader may run at a time.
+
+Edges do not feed any rollup, so the edge loaders leave them alone.
+"""
+import argparse
+import json
+from gremlin_python.process.graph_traversal import __
+from gremlin_python.process.traversal import Cardinality, Operator
+
+from local_graph import connect_to_gremlin_server
+
+ROLLUP_LABEL = "rollup"
+ROLLUP_TYPES = ("agent", "accident_type", "status")
+METRICS = ("claim_count", "approved_count", "claim_amount_total")
+
+# Claim properties the rollups are computed from
+CLAIM_FIELDS = ("assigned_agent_id", "accident_type", "approved", "claim_amount", "close_agent_id")
+
+def _is_approved(value):
+    return str(value).strip().lower() in ("1", "true", "yes")
+
+def claim_contributions(claim):
+    """
+    Return {rollup_id: {metric: value}} for what a single claim adds to each rollup.
+    `claim` is a dict of claim properties; None contributes nothing.
+    """
+    if not claim:
+        return {}
+    metrics = {
+        "claim_count": 1,
+        "approved_count": 1 if _is_approved(claim.get("approved")) else 0,
+        "claim_amount_total": float(claim.get("claim_amount") or 0),
+    }
+    groups = {
+        "accident_type": claim.get("accident_type"),
+        "agent": claim.get("assigned_agent_id"),
+        "status": "closed" if claim.get("close_agent_id") not in (None, "") else "open",
+    }
+    return {
+        f"{rollup_type}:{key}": dict(metrics)
+        for rollup_type, key in groups.items()
+        if key not in (None, "")
+    }
+
+def rollup_deltas(old_claim, new_claim):
+    """
+    Return the per-rollup metric changes for replacing old_claim with new_claim.
+    Rollups whose metrics do not change are omitted.
+    """
+    deltas = {}
+    for sign, claim in ((-1, old_claim), (1, new_claim)):
+        for rollup_id, metrics in claim_contributions(claim).items():
+            delta = deltas.setdefault(rollup_id, dict.fromkeys(METRICS, 0))
+            for metric, value in metrics.items():
+                delta[metric] += sign * value
+    return {rollup_id: delta for rollup_id, delta in deltas.items() if any(delta.values())}
+
+def merge_deltas(total, deltas):
+    """
+    Add deltas into the running total in place, for callers that apply them in one batch.
+    """
+    for rollup_id, delta in deltas.items():
+        current = total.setdefault(rollup_id, dict.fromkeys(METRICS, 0))
+        for metric, value in delta.items():
+            current[metric] += value
+    return total
+
+def build_claim_state_read(g, claim_id, fields=CLAIM_FIELDS):
+    """
+    Build the traversal returning the valueMap of the rollup-relevant properties of a claim.
+    Callers needing more of the stored claim can pass extra fields.
+    """
+    return g.V().has("claim", "claim_id", str(claim_id)).valueMap(*fields)
+
+def claim_state_from_rows(rows):
+    """
+    Turn the result of build_claim_state_read() into a claim dict, or None if there was no claim.
+    """
+    if not rows:
+        return None
+    return {key: values[0] for key, values in rows[0].items() if values}
+
+def read_claim_state(g, claim_id):
+    """
+    Return the rollup-relevant properties of a stored claim, or None if it does not exist yet.
+    """
+    return claim_state_from_rows(build_claim_state_read(g, claim_id).toList())
+
+def build_rollup_update(g, rollup_id, delta):
+    """
+    Build the traversal that creates the rollup vertex if needed and adds delta to its metrics.
+    The increments run server-side in one traversal (sack arithmetic), so there is no
+    read-modify-write round trip from the client.
+    """
+    rollup_type, _, rollup_key = rollup_id.partition(":")
+    create = __.addV(ROLLUP_LABEL).property("rollup_id", rollup_id) \
+        .property("rollup_type", rollup_type).property("rollup_key", rollup_key)
+    for metric in METRICS:
+        create = create.property(metric, 0.0 if metric == "claim_amount_total" else 0)
+
+    t = g.withSack(0).V().has(ROLLUP_LABEL, "rollup_id", rollup_id).fold().coalesce(__.unfold(), create)
+    for metric, value in delta.items():
+        if not value:
+            continue
+        t = t.sack(Operator.assign).by(metric).sack(Operator.sum_).by(__.constant(value)) \
+            .property(Cardinality.single, metric, __.sack())
+    return t
+
+def apply_rollup_deltas(g, deltas):
+    """
+    Apply a {rollup_id: delta} mapping to the rollup vertices.
+    """
+    for rollup_id, delta in deltas.items():
+        build_rollup_update(g, rollup_id, delta).iterate()
+
+def update_claim_rollups(g, old_claim, new_claim):
+    """
+    Update the rollups for one claim insert (old_claim is None) or change.
+    """
+    apply_rollup_deltas(g, rollup_deltas(old_claim, new_claim))
+
+def read_claim_state_cosmos(gremlin_client, claim_id, claim_pk, partition_key="pk"):
+    """
+    Cosmos version of read_claim_state() for the string-query loaders.
+    The claim's vertex id is its claim_id.
+    """
+    fields = ", ".join(f"'{field}'" for field in CLAIM_FIELDS)
+    rows = gremlin_client.submit(
+        f"g.V({json.dumps(str(claim_id))}).has('{partition_key}', {json.dumps(claim_pk)}).valueMap({fields})"
+    ).all().result()
+    return claim_state_from_rows(rows)
+
+def apply_rollup_deltas_cosmos(gremlin_client, deltas, partition_key="pk", read_batch=100):
+    """
+    Cosmos version of apply_rollup_deltas(): reads the current totals read_batch rollups at
+    a time, adds the deltas on the client and writes the new totals. The rollup vertex id
+    is its rollup_id and its partition key value is the rollup label.
+    Each delta is removed from `deltas` once written, so a failed flush can be retried
+    without applying anything twice.
+    """
+    rollup_ids = list(deltas)
+    for start in range(0, len(rollup_ids), read_batch):
+        batch = rollup_ids[start:start + read_batch]
+        ids = ", ".join(json.dumps(rollup_id) for rollup_id in batch)
+        metrics = ", ".join(f"'{metric}'" for metric in METRICS)
+        rows = gremlin_client.submit(
+            f"g.V({ids}).has('{partition_key}', '{ROLLUP_LABEL}').valueMap('rollup_id', {metrics})"
+        ).all().result()
+        current = {row["rollup_id"][0]: {m: row[m][0] for m in METRICS if row.get(m)} for row in rows}
+
+        for rollup_id in batch:
+            rollup_type, _, rollup_key = rollup_id.partition(":")
+            totals = current.get(rollup_id, {})
+            query = (
+                f"g.V({json.dumps(rollup_id)}).has('{partition_key}', '{ROLLUP_LABEL}').fold().coalesce(unfold(), "
+                f"addV('{ROLLUP_LABEL}').property('id', {json.dumps(rollup_id)})"
+                f".property('{partition_key}', '{ROLLUP_LABEL}').property('rollup_id', {json.dumps(rollup_id)})"
+                f".property('rollup_type', {json.dumps(rollup_type)}).property('rollup_key', {json.dumps(rollup_key)}))"
+            )
+            for metric in METRICS:
+                value = totals.get(metric, 0) + deltas[rollup_id].get(metric, 0)
+                query += f".property('{metric}', {json.dumps(value)})"
+            gremlin_client.submit(query).all().result()
+            del deltas[rollup_id]
+
+def read_rollups(g, rollup_type=None):
+    """
+    Return the rollups as dicts, with approval_rate derived from the stored counts.
+    """
+    t = g.V().hasLabel(ROLLUP_LABEL)
+    if rollup_type:
+        t = t.has("rollup_type", rollup_type)
+    rows = []
+    for props in t.valueMap().toList():
+        row = {key: values[0] for key, values in props.items()}
+        count = row.get("claim_count") or 0
+        row["approval_rate"] = row.get("approved_count", 0) / count if count else None
+        rows.append(row)
+    return sorted(rows, key=lambda r: (r.get("rollup_type", ""), str(r.get("rollup_key", ""))))
+
+def rebuild_rollups(g):
+    """
+    Recompute every rollup from the stored claims, replacing the existing rollup vertices.
+    A full scan; use it to backfill or to repair rollups after an interrupted load.
+    """
+    g.V().hasLabel(ROLLUP_LABEL).drop().iterate()
+    totals = {}
+    for props in g.V().hasLabel("claim").valueMap(*CLAIM_FIELDS).toList():
+        claim = {key: values[0] for key, values in props.items() if values}
+        merge_deltas(totals, rollup_deltas(None, claim))
+    apply_rollup_deltas(g, totals)
+    return len(totals)
+
+def main():
+    parser = argparse.ArgumentParser(description="Read or rebuild the claim dashboard rollups.")
+    parser.add_argument("--type", choices=ROLLUP_TYPES, help="only show rollups of this type")
+    parser.add_argument("--rebuild", action="store_true", help="recompute all rollups from the stored claims")
+    args = parser.parse_args()
+
+    g, connection = None, None
+    try:
+        g, connection = connect_to_gremlin_server()
+        if args.rebuild:
+            print(f"[DONE] Rebuilt {rebuild_rollups(g)} rollups")
+        for row in read_rollups(g, args.type):
+            rate = "n/a" if row["approval_rate"] is None else f"{row['approval_rate']:.1%}"
+            print(f"{row['rollup_id']:<40} claims={row['claim_count']:<8} approved={rate:<7} "
+                  f"amount={row['claim_amount_total']:,.2f}")
+    finally:
+        if connection:
+            connection.close()
+
+if __name__ == "__main__":
+    main()
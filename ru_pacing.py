@@ -0,0 +1,82 @@
+"""
+ru_pacing.py
+
+Request pacing and throttle retries for Cosmos DB, shared by reset_graph.py and
+create_edges_cosmos.py. Cosmos reports the request units (RU) each request charged and
+answers requests over the provisioned throughput with status 429 and the delay it wants.
+"""
+import time
+from gremlin_python.driver.protocol import GremlinServerError
+
+# ---- Config ----
+MAX_RETRIES = 10      # Attempts per request when Cosmos throttles
+DEFAULT_RETRY_DELAY = 1.0   # Seconds to wait when a throttled response has no usable delay
+# ----------------
+
+class RuPacer:
+    """
+    Spaces requests out so the request units spent stay under ru_budget per second.
+    A budget of 0 (or a target that reports no charges) never waits.
+    """
+
+    def __init__(self, ru_budget):
+        self.ru_budget = ru_budget
+        self.total = 0.0
+        self.started = time.monotonic()
+
+    def spend(self, charge):
+        self.total += charge
+
+    def wait(self):
+        if self.ru_budget <= 0:
+            return
+        # The spend so far is allowed once total / budget seconds have passed
+        delay = self.total / self.ru_budget - (time.monotonic() - self.started)
+        if delay > 0:
+            time.sleep(delay)
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.total / elapsed if elapsed else 0.0
+
+def retry_after_seconds(value):
+    """
+    Parse x-ms-retry-after-ms into seconds. Cosmos sends it as a .NET TimeSpan such as
+    '00:00:03.9500000'; a plain number of milliseconds is accepted too. Anything else
+    gives DEFAULT_RETRY_DELAY.
+    """
+    try:
+        if isinstance(value, str) and ":" in value:
+            hours, minutes, seconds = value.split(":")
+            return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        return float(value) / 1000
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_DELAY
+
+def _throttle_delay(error):
+    # Cosmos reports throttling as status 429 with the wait it wants in x-ms-retry-after-ms
+    attributes = getattr(error, "status_attributes", None) or {}
+    if attributes.get("x-ms-status-code") == 429 or "429" in str(error):
+        return retry_after_seconds(attributes.get("x-ms-retry-after-ms"))
+    return None
+
+def submit_paced(gremlin_client, query, bindings, pacer):
+    """
+    Submit a query, retrying throttled attempts, and return (results, request charge).
+    """
+    for attempt in range(1, MAX_RETRIES + 1):
+        pacer.wait()
+        try:
+            result_set = gremlin_client.submit(query, bindings)
+            results = result_set.all().result()
+        except GremlinServerError as e:
+            delay = _throttle_delay(e)
+            if delay is None or attempt == MAX_RETRIES:
+                raise
+            print(f"[WARN] Throttled, retrying in {delay:.2f}s (attempt {attempt}/{MAX_RETRIES})")
+            time.sleep(delay)
+            continue
+        charge = float((result_set.status_attributes or {}).get("x-ms-total-request-charge", 0))
+        pacer.spend(charge)
+        return results, charge
+    raise RuntimeError("unreachable")
@@ -2,7 +2,7 @@
 
 # ==== CONFIGURE PATH ====
 GREMLIN_SERVER_DIR="./apache-tinkerpop-gremlin-server-3.7.3"
-SERVER_CONF_FILE="conf/gremlin-server.yaml"   # Change if you use a different config
+SERVER_CONF_FILE="${1:-conf/gremlin-server.yaml}"   # Pass a different config as the first argument
 
 # ==== START GREMLIN SERVER ====
 echo "Starting Gremlin Server with config: $SERVER_CONF_FILE"